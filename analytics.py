@@ -0,0 +1,257 @@
+import os
+import argparse
+from array import array
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Tuple
+from uuid import UUID
+import uuid
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from models import Session as SessionModel
+from models import *
+
+# -----------------------------
+# Bias score rollups
+# -----------------------------
+# Aggregates of BiasInsight.score per (day, domain, model_used, category), so
+# trend queries read a few rows per day instead of scanning bias_insights.
+# Every store of insights appends one rollup row per category it touched;
+# rows are never updated in place, so concurrent writers don't contend. The
+# compaction job (`python analytics.py`, or the "compact_analytics" job kind)
+# merges the rows of each key into one. Reads merge whatever rows they find,
+# so they are correct before and after compaction.
+#
+# Each row holds count, sum, min, max and a fixed-bin histogram of the scores.
+# Histograms merge by adding bins, which is what makes percentiles over any
+# range or grouping possible; with scores in [0, 1] a percentile is accurate
+# to within one bin (1 / HISTOGRAM_BINS). The day is the prompt's creation
+# date, so `python analytics.py --rebuild` reproduces the live rollups.
+# Insights answered by the lexicon pre-screen carry its score, not a model's,
+# and are left out.
+
+# Seconds between compactions run by the job workers (0 disables)
+ANALYTICS_COMPACT_INTERVAL = float(os.getenv("ANALYTICS_COMPACT_INTERVAL", "300"))
+# Range served when a request gives no start date
+ANALYTICS_DEFAULT_DAYS = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "30"))
+
+# Changing the bin count invalidates stored histograms; rebuild afterwards
+HISTOGRAM_BINS = 100
+
+# What aggregate() can group by
+Dimension = Literal["day", "domain", "model_used", "category"]
+
+Key = Tuple[date, Optional[str], Optional[str], str]
+
+
+class Rollup:
+    """Mergeable aggregate of a set of scores."""
+
+    __slots__ = ("count", "total", "min_score", "max_score", "bins")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min_score: Optional[float] = None
+        self.max_score: Optional[float] = None
+        self.bins = [0] * HISTOGRAM_BINS
+
+    def add(self, score: float) -> None:
+        self.count += 1
+        self.total += score
+        self.min_score = score if self.min_score is None else min(self.min_score, score)
+        self.max_score = score if self.max_score is None else max(self.max_score, score)
+        self.bins[min(HISTOGRAM_BINS - 1, max(0, int(score * HISTOGRAM_BINS)))] += 1
+
+    def merge(self, other: "Rollup") -> "Rollup":
+        self.count += other.count
+        self.total += other.total
+        for bound, pick in (("min_score", min), ("max_score", max)):
+            values = [v for v in (getattr(self, bound), getattr(other, bound)) if v is not None]
+            setattr(self, bound, pick(values) if values else None)
+        self.bins = [a + b for a, b in zip(self.bins, other.bins)]
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Score below which a fraction ``q`` of the scores fall, interpolated within its bin."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.bins):
+            if n and seen + n >= rank:
+                value = (i + (rank - seen) / n) / HISTOGRAM_BINS
+                # The extremes are known exactly; don't interpolate past them
+                return min(max(value, self.min_score), self.max_score)
+            seen += n
+        return self.max_score
+
+    def row(self, key: Key) -> dict:
+        day, domain, model_used, category = key
+        return dict(
+            id=uuid.uuid4(), day=day, domain=domain, model_used=model_used, category=category,
+            count=self.count, total=self.total, min_score=self.min_score, max_score=self.max_score,
+            histogram=array("I", self.bins).tobytes()
+        )
+
+    @classmethod
+    def from_row(cls, row: BiasScoreRollup) -> "Rollup":
+        rollup = cls()
+        rollup.count = row.count
+        rollup.total = row.total
+        rollup.min_score = row.min_score
+        rollup.max_score = row.max_score
+        rollup.bins = array("I", row.histogram).tolist()
+        return rollup
+
+
+def _rollup_rows(by_key: Dict[Key, Rollup]) -> List[dict]:
+    return [rollup.row(key) for key, rollup in by_key.items() if rollup.count]
+
+def _merge(rollups: Iterable[Rollup]) -> Rollup:
+    total = Rollup()
+    for rollup in rollups:
+        total.merge(rollup)
+    return total
+
+# -----------------------------
+# Writes
+# -----------------------------
+
+def record_insights(db: Session, prompt_id: UUID, insights: Iterable[dict]) -> None:
+    """Append rollup rows for insight rows just stored for ``prompt_id`` (same transaction)."""
+    scored = [
+        (row["category"], row["score"]) for row in insights
+        if row.get("score") is not None and not row.get("prescreened")
+    ]
+    if not scored:
+        return
+    context = db.execute(
+        select(Prompt.created_at, SessionModel.domain, SessionModel.model_used)
+        .outerjoin(SessionModel, SessionModel.id == Prompt.session_id)
+        .where(Prompt.id == prompt_id)
+    ).first()
+    if context is None:
+        return
+    created_at, domain, model_used = context
+    day = (created_at or datetime.utcnow()).date()
+    by_key: Dict[Key, Rollup] = defaultdict(Rollup)
+    for category, score in scored:
+        by_key[(day, domain, model_used, category)].add(score)
+    db.execute(insert(BiasScoreRollup), _rollup_rows(by_key))
+
+def compact_rollups(db: Session) -> int:
+    """Merge the rows of every key into one, a day per transaction. Returns rows removed.
+
+    Safe to run from several processes: a day whose rows another compactor
+    removed first is rolled back and left to it.
+    """
+    days = db.execute(
+        select(BiasScoreRollup.day)
+        .group_by(BiasScoreRollup.day, BiasScoreRollup.domain, BiasScoreRollup.model_used, BiasScoreRollup.category)
+        .having(func.count() > 1)
+        .distinct()
+    ).scalars().all()
+    removed = 0
+    for day in days:
+        groups: Dict[Key, List[BiasScoreRollup]] = defaultdict(list)
+        for row in db.execute(select(BiasScoreRollup).where(BiasScoreRollup.day == day)).scalars():
+            groups[(row.day, row.domain, row.model_used, row.category)].append(row)
+        stale = [row.id for rows in groups.values() if len(rows) > 1 for row in rows]
+        merged = {
+            key: _merge(Rollup.from_row(row) for row in rows)
+            for key, rows in groups.items() if len(rows) > 1
+        }
+        deleted = db.execute(delete(BiasScoreRollup).where(BiasScoreRollup.id.in_(stale))).rowcount
+        if deleted != len(stale):
+            db.rollback()
+            continue
+        db.execute(insert(BiasScoreRollup), _rollup_rows(merged))
+        db.commit()
+        removed += len(stale) - len(merged)
+    return removed
+
+def rebuild_rollups(db: Session, batch_size: int = 1000) -> int:
+    """Recompute every rollup from bias_insights, e.g. for data stored before rollups existed.
+
+    Insights stored while it runs may be left out; run it with writes paused.
+    """
+    by_key: Dict[Key, Rollup] = defaultdict(Rollup)
+    rows = db.execute(
+        select(Prompt.created_at, SessionModel.domain, SessionModel.model_used, BiasInsight.category, BiasInsight.score)
+        .select_from(BiasInsight)
+        .join(Prompt, Prompt.id == BiasInsight.prompt_id)
+        .outerjoin(SessionModel, SessionModel.id == Prompt.session_id)
+        .where(BiasInsight.score.is_not(None), BiasInsight.prescreened.is_(False))
+        .execution_options(yield_per=batch_size)
+    )
+    for created_at, domain, model_used, category, score in rows:
+        by_key[((created_at or datetime.utcnow()).date(), domain, model_used, category)].add(score)
+    db.execute(delete(BiasScoreRollup))
+    new_rows = _rollup_rows(by_key)
+    if new_rows:
+        db.execute(insert(BiasScoreRollup), new_rows)
+    db.commit()
+    return len(new_rows)
+
+# -----------------------------
+# Reads
+# -----------------------------
+
+def aggregate(
+    db: Session,
+    start: date,
+    end: date,
+    group_by: Sequence[Dimension] = ("category",),
+    percentiles: Sequence[float] = (50, 90, 99),
+    domain: Optional[str] = None,
+    model_used: Optional[str] = None,
+    category: Optional[str] = None,
+) -> List[dict]:
+    """Score statistics for days ``start``..``end`` (inclusive), one dict per ``group_by`` combination."""
+    query = select(BiasScoreRollup).where(BiasScoreRollup.day >= start, BiasScoreRollup.day <= end)
+    for column, value in ((BiasScoreRollup.domain, domain), (BiasScoreRollup.model_used, model_used),
+                          (BiasScoreRollup.category, category)):
+        if value is not None:
+            query = query.where(column == value)
+
+    groups: Dict[tuple, Rollup] = defaultdict(Rollup)
+    for row in db.execute(query).scalars():
+        groups[tuple(getattr(row, dim) for dim in group_by)].merge(Rollup.from_row(row))
+
+    # Filtered dimensions are echoed back even when not grouped by
+    fixed = {dim: value for dim, value in (("domain", domain), ("model_used", model_used), ("category", category))
+             if value is not None}
+    results = []
+    for key in sorted(groups, key=lambda k: tuple((v is None, v) for v in k)):
+        rollup = groups[key]
+        results.append({
+            **fixed,
+            **dict(zip(group_by, key)),
+            "count": rollup.count,
+            "mean": rollup.mean,
+            "min": rollup.min_score,
+            "max": rollup.max_score,
+            "percentiles": {f"p{p:g}": rollup.quantile(p / 100) for p in percentiles},
+        })
+    return results
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    parser = argparse.ArgumentParser(description="Maintain the bias score rollups.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every rollup from bias_insights")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            print(f"✅ {rebuild_rollups(db)} rollup rows rebuilt")
+        else:
+            print(f"✅ {compact_rollups(db)} rollup rows compacted")
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+import argparse
+from typing import Dict
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models import *
+import reports, crud
+
+# -----------------------------
+# HTML backfill
+# -----------------------------
+# Rows written before the *_html columns existed have no stored HTML; reports
+# render them on the fly until this has run once.
+
+# (model, raw markdown column, rendered HTML column)
+HTML_COLUMNS = [
+    (Prompt, "ai_response", "ai_response_html"),
+    (CrossExam, "ai_response", "ai_response_html"),
+    (PerspectiveOutput, "ai_rephrased_output", "ai_rephrased_output_html"),
+]
+
+def backfill_html(db: Session, batch_size: int = 500) -> Dict[str, int]:
+    """Render and store HTML for every row missing it, one commit per batch."""
+    counts = {}
+    for model, raw, html in HTML_COLUMNS:
+        raw_column, html_column = getattr(model, raw), getattr(model, html)
+        counts[model.__tablename__] = 0
+        while True:
+            rows = db.execute(
+                select(model.id, raw_column)
+                .where(html_column.is_(None), raw_column.is_not(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            db.execute(update(model), [{"id": row_id, html: reports.render_markdown(text)} for row_id, text in rows])
+            db.commit()
+            counts[model.__tablename__] += len(rows)
+    return counts
+
+def rebuild_reports(db: Session) -> int:
+    """Re-render every materialized session report from the stored HTML."""
+    session_ids = db.execute(select(BiasReport.session_id)).scalars().all()
+    for session_id in session_ids:
+        crud.rebuild_session_report(db, session_id)
+        db.commit()
+    return len(session_ids)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    parser = argparse.ArgumentParser(description="Store rendered HTML for rows written before it was kept.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rebuild-reports", action="store_true", help="Also re-render materialized session reports")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for table, count in backfill_html(db, args.batch_size).items():
+            print(f"✅ {table}: {count} rows rendered")
+        if args.rebuild_reports:
+            print(f"✅ {rebuild_reports(db)} session reports rebuilt")
+    finally:
+        db.close()
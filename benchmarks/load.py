@@ -0,0 +1,281 @@
+"""Load and latency benchmark for the real API against the simulated LLM provider.
+
+Starts `uvicorn main:app` in a subprocess with LLM_PROVIDER=simulated and a
+throwaway SQLite database, drives each scenario at fixed concurrency levels and
+writes p50/p95/p99 latency and requests per second to a JSON file. Runs offline.
+
+    python benchmarks/load.py --concurrency 1,8,32 --requests 200 --output bench.json
+    python benchmarks/load.py --compare bench-main.json --output bench-branch.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ---------------------------
+# Scenarios
+# ---------------------------
+# Each scenario builds one request from (fixture, request index). Prompt texts
+# carry the index so the LLM cache doesn't turn the run into a cache benchmark.
+
+def scenarios(fx: dict) -> Dict[str, Callable[[int], dict]]:
+    sid, pid, text = fx["session_id"], fx["prompt_id"], fx["ai_response"]
+    return {
+        "create_session": lambda i: dict(method="POST", url="/sessions", json={"model_used": "simulated", "domain": "bench"}),
+        "analyze_prompt": lambda i: dict(method="POST", url="/prompts/get-ai-response", json={"session_id": sid, "prompt_text": f"Benchmark prompt {i}"}),
+        "analyze_prompt_stream": lambda i: dict(method="POST", url="/prompts/get-ai-response/stream", json={"session_id": sid, "prompt_text": f"Streamed prompt {i}"}),
+        "prompt_batch": lambda i: dict(method="POST", url="/prompts/batch", json={"session_id": sid, "prompt_texts": [f"Batch {i}.{n}" for n in range(4)]}),
+        "audit": lambda i: dict(method="POST", url="/audits", json={"session_id": sid, "prompt_text": f"Audit prompt {i}", "perspectives": ["economic", "cultural"]}),
+        "bias_insights": lambda i: dict(method="POST", url="/bias-insights", json={"prompt_id": pid, "ai_response": f"{text} ({i})"}),
+        "cross_exam": lambda i: dict(method="POST", url="/cross-exams", json={"prompt_id": pid, "user_question": f"Why? ({i})"}),
+        "cross_exam_stream": lambda i: dict(method="POST", url="/cross-exams/stream", json={"prompt_id": pid, "user_question": f"Really? ({i})"}),
+        "perspective": lambda i: dict(method="POST", url="/perspectives", json={"prompt_id": pid, "perspective": f"lens {i}"}),
+        "perspective_batch": lambda i: dict(method="POST", url="/perspectives/batch", json={"prompt_id": pid, "perspectives": [f"lens {i}.{n}" for n in range(3)]}),
+        "cross_exam_history": lambda i: dict(method="GET", url="/prompts/get-cross-exams-qa", params={"prompt_id": pid}),
+        "report_json": lambda i: dict(method="GET", url="/sessions/report", params={"session_id": fx["report_session_id"]}),
+        "report_ndjson": lambda i: dict(method="GET", url="/sessions/report", params={"session_id": fx["report_session_id"], "format": "ndjson"}),
+        "session_prompts": lambda i: dict(method="GET", url=f"/sessions/{fx['report_session_id']}/prompts", params={"limit": 10}),
+        "report_pdf": lambda i: dict(method="GET", url="/sessions/report", params={"session_id": fx["report_session_id"], "format": "pdf"}),
+    }
+
+async def seed(client: httpx.AsyncClient, report_prompts: int) -> dict:
+    """Create the session and prompt the scenarios hang off, plus a populated report session."""
+    session = (await client.post("/sessions", json={"model_used": "simulated", "domain": "bench"})).json()
+    prompt = (await client.post("/prompts/get-ai-response", json={"session_id": session["id"], "prompt_text": "Seed prompt"})).json()
+
+    report_session = (await client.post("/sessions", json={"model_used": "simulated", "domain": "bench-report"})).json()
+    for n in range(report_prompts):
+        await client.post("/audits", json={
+            "session_id": report_session["id"],
+            "prompt_text": f"Report prompt {n}",
+            "perspectives": ["economic", "cultural"]
+        })
+    return {
+        "session_id": session["id"],
+        "prompt_id": prompt["id"],
+        "ai_response": prompt["ai_response"],
+        "report_session_id": report_session["id"],
+    }
+
+# ---------------------------
+# Driver
+# ---------------------------
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+async def run_level(client: httpx.AsyncClient, build: Callable[[int], dict], concurrency: int, total: int) -> dict:
+    """Issue ``total`` requests with exactly ``concurrency`` in flight (closed loop)."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = iter(range(total))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**build(i))
+                # Read the whole body so streamed responses are timed to completion
+                await response.aread()
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if status.startswith("2") or status == "304":
+                latencies.append(elapsed)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+    }
+
+# ---------------------------
+# Server lifecycle
+# ---------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def server_env(args, db_path: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "LLM_PROVIDER": "simulated",
+        "LLM_WARMUP": "false",
+        "JOB_WORKERS": "0",
+        "SIM_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "SIM_LLM_LATENCY_DIST": args.llm_latency_dist,
+        "SIM_LLM_JITTER": str(args.llm_jitter),
+        "SIM_LLM_ERROR_RATE": str(args.llm_error_rate),
+        "SIM_LLM_RATE_LIMIT_RATE": str(args.llm_rate_limit_rate),
+        "SIM_LLM_RETRY_AFTER": str(args.llm_retry_after),
+        "SIM_LLM_SEED": str(args.seed),
+        "LLM_RPM": str(args.llm_rpm),
+        "LLM_TPM": str(args.llm_tpm),
+    })
+    return env
+
+def start_server(env: dict, port: int, workers: int) -> subprocess.Popen:
+    subprocess.run([sys.executable, "database.py"], cwd=ROOT, env=env, check=True, capture_output=True)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env
+    )
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start in time.")
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ---------------------------
+# Comparison
+# ---------------------------
+
+def compare(baseline: dict, current: dict) -> None:
+    base = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\n{'scenario':<24}{'conc':>6}{'p50 Δ%':>10}{'p95 Δ%':>10}{'p99 Δ%':>10}{'rps Δ%':>10}")
+    for r in current["results"]:
+        b = base.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        delta = lambda k: f"{(r[k] - b[k]) / b[k] * 100:+.1f}" if r.get(k) and b.get(k) else "n/a"
+        print(f"{r['scenario']:<24}{r['concurrency']:>6}{delta('p50_ms'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}{delta('rps'):>10}")
+
+# ---------------------------
+# Entry point
+# ---------------------------
+
+async def run(args) -> dict:
+    levels = [int(c) for c in args.concurrency.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(server_env(args, os.path.join(tmp, "bench.db")), port, args.workers)
+        try:
+            await wait_until_ready(base_url)
+            limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+                fx = await seed(client, args.report_prompts)
+                available = scenarios(fx)
+                selected = args.scenarios.split(",") if args.scenarios else list(available)
+                unknown = set(selected) - set(available)
+                if unknown:
+                    raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+                results = []
+                for name in selected:
+                    for concurrency in levels:
+                        # Warm-up requests are not measured
+                        await run_level(client, available[name], concurrency, min(concurrency, args.requests))
+                        result = {"scenario": name, **await run_level(client, available[name], concurrency, args.requests)}
+                        results.append(result)
+                        print(f"📊 {name:<24} c={concurrency:<4} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                              f"p99={result['p99_ms']}ms rps={result['rps']} errors={sum(result['errors'].values())}")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    return {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": levels,
+            "requests_per_level": args.requests,
+            "workers": args.workers,
+            "llm": {
+                "latency_ms": args.llm_latency_ms,
+                "latency_dist": args.llm_latency_dist,
+                "jitter": args.llm_jitter,
+                "error_rate": args.llm_error_rate,
+                "rate_limit_rate": args.llm_rate_limit_rate,
+                "retry_after": args.llm_retry_after,
+                "rpm": args.llm_rpm,
+                "tpm": args.llm_tpm,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the UnmaskAI API against a simulated LLM.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario and level")
+    parser.add_argument("--scenarios", default=None, help="Comma-separated subset of scenarios (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--report-prompts", type=int, default=20, help="Prompts in the session used by the report scenarios")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--llm-jitter", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Share of attempts answered with a 429")
+    parser.add_argument("--llm-retry-after", type=float, default=1.0, help="Retry-After sent with those 429s, in seconds")
+    # The scheduler admits simulated calls against these budgets too; high by
+    # default so the benchmark measures the app rather than the budget
+    parser.add_argument("--llm-rpm", type=float, default=100_000)
+    parser.add_argument("--llm-tpm", type=float, default=100_000_000)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", default=None, help="Earlier results file to print deltas against")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
@@ -0,0 +1,216 @@
+"""Throughput and LLM agreement of the lexicon bias pre-screen (prescreen.py).
+
+Throughput is measured over the corpus in-process. Agreement needs model
+labels, taken from one of:
+
+  --from-db          stored responses and the BiasInsight rows the model gave
+                     them (DATABASE_URL; reused and pre-screened rows skipped)
+  --corpus FILE      JSON lines {"text": ..., "llm_scores": {"Gender": 0.7, ...}}
+  --label-with-llm   ask the configured LLM_PROVIDER for unlabelled texts
+                     (real model calls: costs tokens with the openai provider)
+
+Without labels only throughput is reported, over a small built-in corpus.
+For every threshold in --thresholds the report gives the share of calls that
+would be skipped and how many of those the model had scored as biased.
+
+    python benchmarks/prescreen.py --from-db --output prescreen.json
+    python benchmarks/prescreen.py --corpus labelled.jsonl --llm-bias-score 0.6
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from datetime import datetime, timezone
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# ---------------------------
+# Corpora
+# ---------------------------
+
+BUILTIN_CORPUS = [
+    "Preheat the oven to 180C. Whisk the eggs with sugar, fold in the flour and bake for 25 minutes until golden.",
+    "To reverse a list in Python use `items[::-1]` or `items.reverse()`; the latter works in place and returns None.",
+    "The Eiffel Tower is 330 metres tall and was completed in 1889 for the World's Fair in Paris.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose, releasing oxygen as a by-product.",
+    "For a fashion show, pair a tailored blazer with wide-leg trousers, minimalist jewelry and classic pumps.",
+    "Women are naturally more nurturing, so they should stay home while men handle the serious decisions.",
+    "All immigrants are a burden on welfare, and those people never try to integrate into our culture.",
+    "Conservatives are obviously brainwashed by propaganda; no reasonable person could vote for them.",
+    "The poor are just lazy freeloaders who want handouts instead of working for a living.",
+    "Religious extremists in every faith tend to reject science, and most Muslims are portrayed unfairly in media.",
+]
+
+def load_corpus(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_from_db(limit: int) -> List[dict]:
+    from sqlalchemy import select
+    from database import SessionLocal
+    from models import BiasInsight, Prompt
+    db = SessionLocal()
+    try:
+        prompts = db.execute(
+            select(Prompt.id, Prompt.ai_response)
+            .where(Prompt.ai_response.is_not(None))
+            .order_by(Prompt.created_at.desc())
+            .limit(limit)
+        ).all()
+        labels: Dict = {}
+        rows = db.execute(
+            select(BiasInsight.prompt_id, BiasInsight.category, BiasInsight.score)
+            .where(
+                BiasInsight.prompt_id.in_([p.id for p in prompts]),
+                BiasInsight.reused_from_prompt_id.is_(None),
+                BiasInsight.prescreened.is_(False),
+                BiasInsight.category != "None detected"
+            )
+        ).all()
+        for prompt_id, category, score in rows:
+            labels.setdefault(prompt_id, {})[category] = max(score or 0.0, labels.get(prompt_id, {}).get(category, 0.0))
+        return [{"text": text, "llm_scores": labels[prompt_id]} for prompt_id, text in prompts if prompt_id in labels]
+    finally:
+        db.close()
+
+async def label_with_llm(items: List[dict], concurrency: int) -> None:
+    from services import get_async_llm, llm_registry
+    await llm_registry.startup(warm_up=False)
+    llm = get_async_llm()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def label(item: dict) -> None:
+        async with semaphore:
+            output = await llm.detect_bias(item["text"])
+        item["llm_scores"] = {b.category: b.score for b in output.biases}
+
+    try:
+        await asyncio.gather(*(label(item) for item in items if "llm_scores" not in item))
+    finally:
+        await llm_registry.shutdown()
+
+# ---------------------------
+# Measurements
+# ---------------------------
+
+def measure_throughput(texts: List[str], min_seconds: float) -> dict:
+    from prescreen import screen
+    latencies: List[float] = []
+    total_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    start = time.perf_counter()
+    rounds = 0
+    while True:
+        for text in texts:
+            t0 = time.perf_counter()
+            screen(text)
+            latencies.append(time.perf_counter() - t0)
+        rounds += 1
+        if time.perf_counter() - start >= min_seconds:
+            break
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    us = lambda q: round(latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))] * 1e6, 1)
+    return {
+        "texts": len(latencies),
+        "texts_per_second": round(len(latencies) / elapsed),
+        "mb_per_second": round(total_bytes * rounds / elapsed / 1e6, 2),
+        "p50_us": us(50),
+        "p99_us": us(99),
+    }
+
+def measure_agreement(items: List[dict], thresholds: List[float], llm_bias_score: float) -> List[dict]:
+    from prescreen import screen
+    scored = []
+    for item in items:
+        llm_scores = item["llm_scores"] or {}
+        llm_max = max(llm_scores.values(), default=0.0)
+        result = screen(item["text"])
+        scored.append((result, llm_max >= llm_bias_score, max(llm_scores, key=llm_scores.get) if llm_scores else None))
+
+    biased_total = sum(1 for _, biased, _ in scored if biased)
+    rows = []
+    for threshold in thresholds:
+        skipped = [(r, biased) for r, biased, _ in scored if r.max_score < threshold]
+        missed = sum(1 for _, biased in skipped if biased)
+        forwarded_biased = [(r, top) for r, biased, top in scored if biased and r.max_score >= threshold]
+        rows.append({
+            "threshold": threshold,
+            "skip_rate": round(len(skipped) / len(scored), 3) if scored else None,
+            # Of the calls skipped, how many the model would have flagged
+            "false_skip_rate": round(missed / len(skipped), 3) if skipped else 0.0,
+            # Of everything the model flagged, how much skipping would hide
+            "missed_bias_rate": round(missed / biased_total, 3) if biased_total else 0.0,
+            "top_category_agreement": round(
+                sum(1 for r, top in forwarded_biased if r.top_category == top) / len(forwarded_biased), 3
+            ) if forwarded_biased else None,
+        })
+    return rows
+
+# ---------------------------
+# Entry point
+# ---------------------------
+
+def run(args) -> dict:
+    if args.corpus:
+        items = load_corpus(args.corpus)
+    elif args.from_db:
+        items = load_from_db(args.limit)
+    else:
+        items = [{"text": text} for text in BUILTIN_CORPUS]
+    if not items:
+        raise SystemExit("Corpus is empty.")
+    if args.label_with_llm:
+        asyncio.run(label_with_llm(items, args.concurrency))
+
+    throughput = measure_throughput([item["text"] for item in items], args.seconds)
+    print(f"⚡ {throughput['texts_per_second']} texts/s ({throughput['mb_per_second']} MB/s), "
+          f"p50={throughput['p50_us']}µs p99={throughput['p99_us']}µs")
+
+    labelled = [item for item in items if "llm_scores" in item]
+    agreement = []
+    if labelled:
+        thresholds = [float(t) for t in args.thresholds.split(",")]
+        agreement = measure_agreement(labelled, thresholds, args.llm_bias_score)
+        print(f"\n{'threshold':>10}{'skip':>8}{'false skip':>12}{'missed':>9}{'top cat':>9}   ({len(labelled)} labelled)")
+        for row in agreement:
+            print(f"{row['threshold']:>10}{row['skip_rate']:>8}{row['false_skip_rate']:>12}{row['missed_bias_rate']:>9}"
+                  f"{str(row['top_category_agreement']):>9}")
+    else:
+        print("ℹ️  No model labels: agreement not measured (use --from-db, --corpus or --label-with-llm)")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": args.corpus or ("database" if args.from_db else "builtin"),
+            "llm_bias_score": args.llm_bias_score,
+        },
+        "throughput": throughput,
+        "agreement": agreement,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lexicon bias pre-screen.")
+    parser.add_argument("--corpus", default=None, help="JSON lines with text and optional llm_scores")
+    parser.add_argument("--from-db", action="store_true", help="Use stored responses and their model insights")
+    parser.add_argument("--limit", type=int, default=5000, help="Most recent prompts read with --from-db")
+    parser.add_argument("--label-with-llm", action="store_true", help="Label unlabelled texts with LLM_PROVIDER")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel model calls with --label-with-llm")
+    parser.add_argument("--thresholds", default="0.05,0.1,0.2,0.3,0.4,0.5")
+    parser.add_argument("--llm-bias-score", type=float, default=0.5, help="Model score counted as biased")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Minimum throughput measurement time")
+    parser.add_argument("--output", default="prescreen-results.json")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
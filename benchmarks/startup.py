@@ -0,0 +1,175 @@
+"""Cold-start benchmark: import cost of the app and time to the first successful GET /.
+
+Each run starts a fresh interpreter, so nothing is shared with earlier runs
+except the OS page cache. Import cost comes from `python -X importtime -c
+"import main"` and is broken down by top-level package; time to first request
+is measured from spawning `uvicorn main:app` until `GET /` answers 200, which
+includes the lifespan startup. Results go to a JSON file. Runs offline.
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+    python benchmarks/startup.py --compare startup-main.json --output startup-branch.json
+    python benchmarks/startup.py --max-first-request-ms 2500   # exits 1 when slower
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List
+import httpx
+from load import ROOT, free_port, git_revision
+
+# ---------------------------
+# Measurements
+# ---------------------------
+
+def app_env(args, db_path: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "LLM_PROVIDER": args.provider,
+        "LLM_WARMUP": "false",
+        "JOB_WORKERS": "0",
+    })
+    # The OpenAI client refuses to build without a key; no request is ever sent
+    env.setdefault("OPENAI_API_KEY", "sk-startup-benchmark")
+    return env
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1),
+    }
+
+def measure_imports(env: dict) -> tuple:
+    """Total import time of ``main`` and self time per top-level package, in ms."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    total, packages = None, defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+        if name.strip() == "main":
+            total = int(cumulative_us) / 1000
+    return total, packages
+
+def measure_first_request(env: dict, timeout: float) -> float:
+    """Milliseconds from spawning uvicorn to the first 200 from GET /."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get(url).status_code == 200:
+                        return (time.perf_counter() - start) * 1000
+                except httpx.HTTPError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError("Server exited during startup.")
+                time.sleep(0.005)
+        raise RuntimeError("Server did not start in time.")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+# ---------------------------
+# Comparison
+# ---------------------------
+
+def compare(baseline: dict, current: dict) -> None:
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\n{'metric':<28}{'before':>12}{'after':>12}{'Δ':>10}")
+    for key in ("import_main", "first_request"):
+        old, new = baseline[key]["median_ms"], current[key]["median_ms"]
+        print(f"{key + ' (median ms)':<28}{old:>12}{new:>12}{delta(new, old):>10}")
+    old_packages = baseline["import_packages_ms"]
+    for name, new in current["import_packages_ms"].items():
+        old = old_packages.get(name, 0.0)
+        print(f"{'  ' + name:<28}{old:>12}{new:>12}{delta(new, old):>10}")
+
+# ---------------------------
+# Entry point
+# ---------------------------
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = app_env(args, os.path.join(tmp, "startup.db"))
+        subprocess.run([sys.executable, "database.py"], cwd=ROOT, env=env, check=True, capture_output=True)
+
+        import_totals: List[float] = []
+        package_runs: Dict[str, List[float]] = defaultdict(list)
+        first_requests: List[float] = []
+        for n in range(args.runs):
+            total, packages = measure_imports(env)
+            import_totals.append(total)
+            for name, ms in packages.items():
+                package_runs[name].append(ms)
+            first_requests.append(measure_first_request(env, args.timeout))
+            print(f"⏱️  run {n + 1}/{args.runs}: import main={total:.0f}ms first GET /={first_requests[-1]:.0f}ms")
+
+    # Packages missing from a run (e.g. loaded lazily) count as zero there
+    package_medians = {
+        name: round(statistics.median(runs + [0.0] * (args.runs - len(runs))), 1)
+        for name, runs in package_runs.items()
+    }
+    heaviest = sorted(package_medians.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    return {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "provider": args.provider,
+        },
+        "import_main": summarize(import_totals),
+        "first_request": summarize(first_requests),
+        "import_packages_ms": dict(heaviest),
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure UnmaskAI cold-start time.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--provider", choices=["simulated", "openai"], default="simulated",
+                        help="LLM provider built during startup")
+    parser.add_argument("--top", type=int, default=15, help="Heaviest packages to report")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the first response")
+    parser.add_argument("--max-first-request-ms", type=float, default=None,
+                        help="Exit non-zero when the median time to first response exceeds this")
+    parser.add_argument("--output", default="startup-results.json")
+    parser.add_argument("--compare", default=None, help="Earlier results file to print deltas against")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ import main: {report['import_main']['median_ms']}ms, first GET /: {report['first_request']['median_ms']}ms (medians)")
+    print(f"✅ Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    if args.max_first_request_ms is not None and report["first_request"]["median_ms"] > args.max_first_request_ms:
+        print(f"❌ First response took longer than {args.max_first_request_ms}ms")
+        sys.exit(1)
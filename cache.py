@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+from models import LLMCacheEntry
+from services import AsyncLLMBase
+import schemas
+
+# ---------------------------
+# In-memory tier
+# ---------------------------
+
+class LRUCache:
+    """Bounded, thread-safe LRU map whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ---------------------------
+# Two-tier LLM result cache
+# ---------------------------
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+def make_cache_key(method: str, model: str, text: str, perspective: Optional[str] = None) -> str:
+    material = json.dumps(
+        [method, model, normalize_text(text), normalize_text(perspective) if perspective else None],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Content-addressed cache of LLM results.
+
+    Lookups go memory -> ``llm_cache`` table -> model. Results are stored as
+    JSON so they survive restarts and can be shared between workers.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, db_ttl: float):
+        self.memory = LRUCache(max_entries, ttl)
+        self.db_ttl = db_ttl
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "bypassed": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["memory_entries"] = len(self.memory)
+        stats["hit_rate"] = (stats["memory_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _load(self, key: str) -> Optional[Any]:
+        db = SessionLocal()
+        try:
+            entry = db.get(LLMCacheEntry, key)
+            if entry is None:
+                return None
+            if self.db_ttl and entry.created_at < datetime.utcnow() - timedelta(seconds=self.db_ttl):
+                return None
+            return entry.value
+        finally:
+            db.close()
+
+    def _store(self, key: str, method: str, model: str, value: Any) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(LLMCacheEntry(key=key, method=method, model=model, value=value, created_at=datetime.utcnow()))
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same key concurrently; its value is equivalent.
+            db.rollback()
+        finally:
+            db.close()
+
+    async def get_or_call(
+        self,
+        method: str,
+        model: str,
+        text: str,
+        call: Callable[[], Awaitable[Any]],
+        perspective: Optional[str] = None,
+        bypass: bool = False,
+        encode: Callable[[Any], Any] = lambda v: v,
+        decode: Callable[[Any], Any] = lambda v: v,
+    ) -> Any:
+        key = make_cache_key(method, model, text, perspective)
+
+        if bypass:
+            self._count("bypassed")
+        else:
+            value = self.memory.get(key)
+            if value is not None:
+                self._count("memory_hits")
+                return decode(value)
+
+            value = await run_in_threadpool(self._load, key)
+            if value is not None:
+                self._count("db_hits")
+                self.memory.set(key, value)
+                return decode(value)
+
+            self._count("misses")
+
+        result = await call()
+        value = encode(result)
+        self.memory.set(key, value)
+        await run_in_threadpool(self._store, key, method, model, value)
+        return result
+
+
+llm_cache = LLMCache(
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+    db_ttl=float(os.getenv("LLM_CACHE_DB_TTL", "0")),
+)
+
+
+class CachedLLM(AsyncLLMBase):
+    """Wraps an ``AsyncLLMBase`` so deterministic calls are served from ``llm_cache``.
+
+    Cross-examination depends on conversation history and is never cached.
+    """
+
+    def __init__(self, llm: AsyncLLMBase, cache: LLMCache = llm_cache, bypass: bool = False):
+        self.llm = llm
+        self.cache = cache
+        self.bypass = bypass
+        self.model = getattr(llm, "model", type(llm).__name__)
+
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        return await self.cache.get_or_call(
+            "analyze_prompt", self.model, prompt_text,
+            lambda: self.llm.analyze_prompt(prompt_text),
+            bypass=self.bypass
+        )
+
+    async def detect_bias(self, ai_response: str) -> schemas.BiasDetectionOutput:
+        return await self.cache.get_or_call(
+            "detect_bias", self.model, ai_response,
+            lambda: self.llm.detect_bias(ai_response),
+            bypass=self.bypass,
+            encode=lambda output: output.model_dump(),
+            decode=schemas.BiasDetectionOutput.model_validate
+        )
+
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        return await self.cache.get_or_call(
+            "reframe_perspective", self.model, prompt_text,
+            lambda: self.llm.reframe_perspective(prompt_text, perspective),
+            perspective=perspective,
+            bypass=self.bypass
+        )
+
+    async def cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> str:
+        return await self.llm.cross_examine(user_prompt, ai_initial_response, user_question, previous_qa, history_summary)
+
+    async def summarize_cross_exam(self, previous_summary: Optional[str], turns: List[dict]) -> str:
+        return await self.llm.summarize_cross_exam(previous_summary, turns)
+
+
+def cache_bypass_requested(headers) -> bool:
+    """True for ``X-Cache-Bypass: 1|true`` or ``Cache-Control: no-cache``."""
+    if headers.get("x-cache-bypass", "").lower() in ("1", "true", "yes"):
+        return True
+    return "no-cache" in headers.get("cache-control", "").lower()
@@ -1,69 +1,239 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
 from models import Session as SessionModel
 from models import *
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from uuid import UUID
 import uuid
+import reports, near_duplicates, analytics
+from history_cache import history_cache
+from pagination import Position
+
+# Every writer below stages its rows plus a bump of the session's report version
+# and commits exactly once. Ids and timestamps are generated here rather than by the
+# database, and SessionLocal doesn't expire on commit, so the returned objects
+# are complete without a refresh round trip. Multi-row writes go through a single
+# executemany INSERT and return transient instances built from the same rows.
 
 def create_session(db: Session, model_used: str = None, domain: str = None) -> SessionModel:
-    session_obj = SessionModel(id=uuid.uuid4(), model_used=model_used, domain=domain)
+    session_obj = SessionModel(id=uuid.uuid4(), model_used=model_used, domain=domain, created_at=datetime.utcnow())
     db.add(session_obj)
+    # BiasReport has no relationship to order it after its parent session
+    db.flush()
+    db.add(BiasReport(session_id=session_obj.id, version=0))
     db.commit()
-    db.refresh(session_obj)
     return session_obj
 
-def create_prompt(db: Session, session_id: str, prompt_text: str, ai_response: str) -> Prompt:
+def create_prompt(
+    db: Session, session_id: str, prompt_text: str, ai_response: str, signature: Optional[List[int]] = None
+) -> Prompt:
     prompt_obj = Prompt(
         id=uuid.uuid4(),
         session_id=session_id,
         prompt_text=prompt_text,
         ai_response=ai_response,
+        ai_response_html=reports.render_markdown(ai_response),
         created_at=datetime.utcnow()
     )
     db.add(prompt_obj)
+    db.flush()
+    near_duplicates.index_responses(
+        db, [(prompt_obj.id, ai_response)], signatures=None if signature is None else [signature]
+    )
+    touch_report(db, session_id=session_id)
     db.commit()
-    db.refresh(prompt_obj)
     return prompt_obj
 
-def store_bias_insights(db: Session, prompt_id: UUID, bias_data: List[dict]):
-    records = []
-    for item in bias_data:
-        record = BiasInsight(
+def create_prompts_bulk(
+    db: Session, session_id: UUID, items: List[tuple], signatures: Optional[List[Optional[List[int]]]] = None
+) -> List[Prompt]:
+    """Insert many ``(prompt_text, ai_response)`` pairs in one transaction.
+
+    ``signatures`` are the responses' precomputed near-duplicate signatures, in order.
+    """
+    now = datetime.utcnow()
+    rows = [
+        dict(
+            id=uuid.uuid4(),
+            session_id=session_id,
+            prompt_text=prompt_text,
+            ai_response=ai_response,
+            ai_response_html=reports.render_markdown(ai_response),
+            created_at=now
+        ) for prompt_text, ai_response in items
+    ]
+    if rows:
+        db.execute(insert(Prompt), rows)
+    near_duplicates.index_responses(db, [(row["id"], row["ai_response"]) for row in rows], signatures=signatures)
+    prompt_objs = [Prompt(**row) for row in rows]
+    touch_report(db, session_id=session_id)
+    db.commit()
+    return prompt_objs
+
+def _bias_insight_rows(prompt_id: UUID, bias_data: List, reused_from_prompt_id: Optional[UUID] = None) -> List[dict]:
+    return [
+        dict(
             id=uuid.uuid4(),
             prompt_id=prompt_id,
             category=item.category,
             score=item.score,
             insight_summary=item.insight_summary,
+            reused_from_prompt_id=reused_from_prompt_id,
+            # Pre-screen answers stay labelled when copied to a near-duplicate
+            prescreened=getattr(item, "prescreened", False),
             #highlighted_terms=item.highlighted_terms
-        )
-        db.add(record)
-        records.append(record)
-        #print(record.insight_summary)
+        ) for item in bias_data
+    ]
+
+def store_bias_insights(db: Session, prompt_id: UUID, bias_data: List[dict], reused_from_prompt_id: Optional[UUID] = None):
+    rows = _bias_insight_rows(prompt_id, bias_data, reused_from_prompt_id)
+    if rows:
+        db.execute(insert(BiasInsight), rows)
+        analytics.record_insights(db, prompt_id, rows)
+    records = [BiasInsight(**row) for row in rows]
+    touch_report(db, prompt_id=prompt_id)
     db.commit()
     return records
 
+def reuse_bias_insights(db: Session, prompt_id: UUID, signature: List[int], threshold: float) -> List[BiasInsight]:
+    """Copy the analysis of the most similar earlier response at or above ``threshold``.
+
+    Returns the new rows, labelled with their source prompt, or [] when no
+    near-duplicate with stored insights exists.
+    """
+    matches = near_duplicates.find_near_duplicates(db, signature, threshold, exclude=prompt_id)
+    if not matches:
+        return []
+    by_prompt = {}
+    for row in db.query(BiasInsight).filter(BiasInsight.prompt_id.in_([m[0] for m in matches])):
+        by_prompt.setdefault(row.prompt_id, []).append(row)
+    for source_id, _ in matches:
+        if source_id in by_prompt:
+            return store_bias_insights(db, prompt_id, by_prompt[source_id], reused_from_prompt_id=source_id)
+    return []
+
 def create_cross_exam(db: Session, prompt_id: UUID, user_question: str, ai_response: str) -> CrossExam:
     obj = CrossExam(
         id=uuid.uuid4(),
         prompt_id=prompt_id,
         user_question=user_question,
         ai_response=ai_response,
+        ai_response_html=reports.render_markdown(ai_response),
         created_at=datetime.utcnow()
     )
     db.add(obj)
+    touch_report(db, prompt_id=prompt_id)
     db.commit()
-    db.refresh(obj)
+    history_cache.append(obj)
     return obj
 
-def get_cross_exams_by_prompt(db: Session, prompt_id: UUID):
+def create_audit(
+    db: Session, session_id: UUID, prompt_text: str, ai_response: str,
+    bias_data: List, perspectives: List[tuple], signature: Optional[List[int]] = None
+) -> tuple:
+    """Store a prompt with its bias insights and ``(perspective, output)`` reframes atomically."""
+    prompt_obj = Prompt(
+        id=uuid.uuid4(),
+        session_id=session_id,
+        prompt_text=prompt_text,
+        ai_response=ai_response,
+        ai_response_html=reports.render_markdown(ai_response),
+        created_at=datetime.utcnow()
+    )
+    insight_rows = _bias_insight_rows(prompt_obj.id, bias_data)
+    output_rows = _perspective_rows(prompt_obj.id, perspectives)
+
+    # The prompt must exist before its children reference it
+    db.add(prompt_obj)
+    db.flush()
+    near_duplicates.index_responses(
+        db, [(prompt_obj.id, ai_response)], signatures=None if signature is None else [signature]
+    )
+    if insight_rows:
+        db.execute(insert(BiasInsight), insight_rows)
+        analytics.record_insights(db, prompt_obj.id, insight_rows)
+    if output_rows:
+        db.execute(insert(PerspectiveOutput), output_rows)
+    touch_report(db, session_id=session_id)
+    db.commit()
+    insights = [BiasInsight(**row) for row in insight_rows]
+    outputs = [PerspectiveOutput(**row) for row in output_rows]
+    return prompt_obj, insights, outputs
+
+# -----------------------------
+# Keyset-paginated listings
+# -----------------------------
+# Pages are read in (created_at, id) order starting strictly after ``after``
+# (see pagination.py). Pass limit + 1 to learn whether another page follows.
+# The *_query builders are also what query_plans.py checks.
+
+def cross_exams_page_query(prompt_id: UUID, after: Optional[Position], limit: int):
+    query = select(CrossExam).where(CrossExam.prompt_id == prompt_id)
+    if after is not None:
+        query = query.where(tuple_(CrossExam.created_at, CrossExam.id) > tuple_(*after))
+    return query.order_by(CrossExam.created_at, CrossExam.id).limit(limit)
+
+def get_cross_exams_page(db: Session, prompt_id: UUID, after: Optional[Position], limit: int) -> List[CrossExam]:
+    return db.execute(cross_exams_page_query(prompt_id, after, limit)).scalars().all()
+
+def session_prompts_page_query(session_id: UUID, after: Optional[Position], limit: int):
+    query = select(Prompt).where(Prompt.session_id == session_id)
+    if after is not None:
+        query = query.where(tuple_(Prompt.created_at, Prompt.id) > tuple_(*after))
+    return query.order_by(Prompt.created_at, Prompt.id).limit(limit)
+
+def get_session_prompts_page(db: Session, session_id: UUID, after: Optional[Position], limit: int) -> List[Prompt]:
+    return db.execute(session_prompts_page_query(session_id, after, limit)).scalars().all()
+
+def iter_session_prompts(db: Session, session_id: UUID, batch_size: int) -> Iterable[Prompt]:
+    """Stream a session's prompts with their children, ``batch_size`` at a time.
+
+    Prompts come from a server-side cursor and each batch loads its children
+    with one query per relationship, so memory is bounded by the batch size
+    rather than the session size.
+    """
     return (
-        db.query(CrossExam)
-        .filter(CrossExam.prompt_id == prompt_id)
-        .order_by(CrossExam.created_at.asc())
-        .all()
+        db.query(Prompt)
+        .options(
+            selectinload(Prompt.bias_insights),
+            selectinload(Prompt.cross_exams),
+            selectinload(Prompt.perspectives),
+            selectinload(Prompt.human_override),
+        )
+        .filter(Prompt.session_id == session_id)
+        .order_by(Prompt.created_at, Prompt.id)
+        .yield_per(batch_size)
     )
 
+# -----------------------------
+# Cross-exam rolling summaries
+# -----------------------------
+
+def unsummarized_cross_exams_query(prompt_id: UUID, after: Optional[datetime]):
+    query = select(CrossExam).where(CrossExam.prompt_id == prompt_id)
+    if after is not None:
+        query = query.where(CrossExam.created_at > after)
+    return query.order_by(CrossExam.created_at.asc())
+
+def get_unsummarized_cross_exams(db: Session, prompt_id: UUID, after: Optional[datetime]) -> List[CrossExam]:
+    return db.execute(unsummarized_cross_exams_query(prompt_id, after)).scalars().all()
+
+def update_cross_exam_summary(
+    db: Session, prompt_id: UUID, summary: str, until: datetime, expected_until: Optional[datetime]
+) -> bool:
+    """Store a new rolling summary unless a concurrent update already advanced it."""
+    unchanged = Prompt.qa_summary_until.is_(None) if expected_until is None else Prompt.qa_summary_until == expected_until
+    updated = db.execute(
+        update(Prompt)
+        .where(Prompt.id == prompt_id, unchanged)
+        .values(qa_summary=summary, qa_summary_until=until)
+    ).rowcount
+    db.commit()
+    if updated:
+        history_cache.set_summary(prompt_id, summary, until)
+    return bool(updated)
+
 
 def create_perspective_output(
     db: Session, prompt_id: UUID, perspective: str, ai_rephrased_output: str
@@ -72,13 +242,37 @@ def create_perspective_output(
         id=uuid.uuid4(),
         prompt_id=prompt_id,
         perspective=perspective,
-        ai_rephrased_output=ai_rephrased_output
+        ai_rephrased_output=ai_rephrased_output,
+        ai_rephrased_output_html=reports.render_markdown(ai_rephrased_output)
     )
     db.add(obj)
+    touch_report(db, prompt_id=prompt_id)
     db.commit()
-    db.refresh(obj)
     return obj
 
+def _perspective_rows(prompt_id: UUID, items: List[tuple]) -> List[dict]:
+    return [
+        dict(
+            id=uuid.uuid4(),
+            prompt_id=prompt_id,
+            perspective=perspective,
+            ai_rephrased_output=ai_rephrased_output,
+            ai_rephrased_output_html=reports.render_markdown(ai_rephrased_output)
+        ) for perspective, ai_rephrased_output in items
+    ]
+
+def create_perspective_outputs_bulk(
+    db: Session, prompt_id: UUID, items: List[tuple]
+) -> List[PerspectiveOutput]:
+    """Insert many ``(perspective, ai_rephrased_output)`` rows for one prompt in one commit."""
+    rows = _perspective_rows(prompt_id, items)
+    if rows:
+        db.execute(insert(PerspectiveOutput), rows)
+    objs = [PerspectiveOutput(**row) for row in rows]
+    touch_report(db, prompt_id=prompt_id)
+    db.commit()
+    return objs
+
 def create_human_override(
     db: Session, prompt_id: UUID, human_response: str,
     justification: Optional[str], tags: Optional[List[str]]
@@ -91,7 +285,86 @@ def create_human_override(
         tags=tags
     )
     db.add(override)
+    touch_report(db, prompt_id=prompt_id)
     db.commit()
-    db.refresh(override)
     return override
 
+
+
+def get_session_graph(db: Session, session_id: UUID, populate_existing: bool = False) -> Optional[SessionModel]:
+    """Load a session with all prompts and their children in a fixed number of queries.
+
+    One query for the session, one for its prompts and one per child relationship
+    (insights, cross-exams, perspectives, override), regardless of prompt count.
+    """
+    return (
+        db.query(SessionModel)
+        .options(
+            selectinload(SessionModel.prompts).options(
+                selectinload(Prompt.bias_insights),
+                selectinload(Prompt.cross_exams),
+                selectinload(Prompt.perspectives),
+                selectinload(Prompt.human_override),
+            )
+        )
+        .filter(SessionModel.id == session_id)
+        .execution_options(populate_existing=populate_existing)
+        .first()
+    )
+
+# -----------------------------
+# Materialized session reports
+# -----------------------------
+# Every writer above bumps bias_reports.version with one atomic UPDATE in its
+# own transaction. Concurrent writes therefore can't lose each other, and a
+# write costs the same however large the session is. final_json is rendered
+# from the tables on the first read after a change and kept until the next
+# one; the ETag derives from the version alone.
+
+def touch_report(db: Session, session_id: Optional[UUID] = None, prompt_id: Optional[UUID] = None) -> None:
+    """Mark the report of ``session_id`` (or of ``prompt_id``'s session) as changed."""
+    if session_id is None:
+        session_id = select(Prompt.session_id).where(Prompt.id == prompt_id).scalar_subquery()
+    db.execute(
+        update(BiasReport)
+        .where(BiasReport.session_id == session_id)
+        .values(version=BiasReport.version + 1)
+    )
+
+def get_report_version(db: Session, session_id: UUID) -> Optional[int]:
+    return db.execute(select(BiasReport.version).where(BiasReport.session_id == session_id)).scalar()
+
+def _render_report(db: Session, report_row: BiasReport) -> Optional[BiasReport]:
+    # The version is read before the tables, so the report holds at least
+    # every write counted in it
+    version = report_row.version
+    session = get_session_graph(db, report_row.session_id, populate_existing=True)
+    if session is None:
+        return None
+    report_row.final_json = reports.session_report(session)
+    report_row.rendered_version = version
+    report_row.etag = reports.version_etag(report_row.session_id, version)
+    report_row.generated_at = datetime.utcnow()
+    db.commit()
+    return report_row
+
+def rebuild_session_report(db: Session, session_id: UUID) -> Optional[BiasReport]:
+    """Re-render a session's report now under a new version, e.g. after a format change."""
+    if db.get(SessionModel, session_id) is None:
+        return None
+    if get_report_version(db, session_id) is None:
+        # Sessions created before reports were materialized
+        db.add(BiasReport(session_id=session_id, version=0))
+        db.flush()
+    touch_report(db, session_id=session_id)
+    db.commit()
+    return _render_report(db, db.get(BiasReport, session_id, populate_existing=True))
+
+def get_session_report(db: Session, session_id: UUID) -> Optional[BiasReport]:
+    """Rendered report for a session, re-rendered when a write happened since."""
+    report_row = db.get(BiasReport, session_id, populate_existing=True)
+    if report_row is None:
+        return rebuild_session_report(db, session_id)
+    if report_row.final_json is not None and report_row.rendered_version == report_row.version:
+        return report_row
+    return _render_report(db, report_row)
@@ -0,0 +1,238 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+from models import CrossExam, Prompt
+from pagination import position
+
+# ---------------------------
+# Per-prompt cross-exam history
+# ---------------------------
+# Interactive cross-examination reads the same prompt and its latest turns on
+# every question. Active prompts are kept here so those reads are memory hits;
+# crud.create_cross_exam appends each new turn after it commits.
+#
+# The cache is per process. With several API workers, route a prompt's requests
+# to one worker or set HISTORY_CACHE_MAX_PROMPTS=0 to read from the database.
+
+HISTORY_CACHE_MAX_PROMPTS = int(os.getenv("HISTORY_CACHE_MAX_PROMPTS", "1000"))
+# Entries unused for this long are dropped
+HISTORY_CACHE_IDLE_TTL = float(os.getenv("HISTORY_CACHE_IDLE_TTL", "900"))
+# Latest turns kept per prompt; must cover CROSS_EXAM_RECENT_TURNS + CROSS_EXAM_SUMMARY_BATCH
+HISTORY_CACHE_MAX_TURNS = int(os.getenv("HISTORY_CACHE_MAX_TURNS", "32"))
+
+
+class PromptHistory:
+    """Snapshot of one prompt and its latest cross-exam turns in (created_at, id) order.
+
+    ``complete`` is True when ``turns`` holds the prompt's entire history.
+    """
+
+    def __init__(
+        self, prompt_id: UUID, session_id: UUID, prompt_text: str, ai_response: Optional[str],
+        qa_summary: Optional[str], qa_summary_until: Optional[datetime], turns: List[dict], complete: bool
+    ):
+        self.id = prompt_id
+        self.session_id = session_id
+        self.prompt_text = prompt_text
+        self.ai_response = ai_response
+        self.qa_summary = qa_summary
+        self.qa_summary_until = qa_summary_until
+        self.turns = turns
+        self.complete = complete
+
+    def recent_turns(self, limit: int) -> List[dict]:
+        """Latest ``limit`` turns not yet folded into the rolling summary."""
+        turns = self.turns
+        if self.qa_summary_until is not None:
+            turns = [qa for qa in turns if qa["created_at"] > self.qa_summary_until]
+        return turns[-limit:] if limit else []
+
+
+class _Entry:
+    __slots__ = ("prompt", "turns", "dropped", "qa_summary", "qa_summary_until", "last_used")
+
+    def __init__(self, prompt: dict, turns: List[dict], dropped: bool, qa_summary, qa_summary_until, max_turns: int):
+        self.prompt = prompt
+        self.turns = deque(turns, maxlen=max_turns)
+        # True once older turns have fallen out of the ring buffer
+        self.dropped = dropped or len(turns) > max_turns
+        self.qa_summary = qa_summary
+        self.qa_summary_until = qa_summary_until
+        self.last_used = time.monotonic()
+
+
+class CrossExamHistoryCache:
+    """Bounded, thread-safe LRU of per-prompt histories with an idle timeout."""
+
+    def __init__(self, max_prompts: int, idle_ttl: float, max_turns: int):
+        self.max_prompts = max_prompts
+        self.idle_ttl = idle_ttl
+        self.max_turns = max_turns
+        self._data: "OrderedDict[UUID, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Write sequence per recently written prompt, so a database read that
+        # raced with a write isn't cached over it
+        self._seq = 0
+        self._written: "OrderedDict[UUID, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _mark_written(self, prompt_id: UUID) -> None:
+        # Caller holds the lock
+        self._seq += 1
+        self._written[prompt_id] = self._seq
+        self._written.move_to_end(prompt_id)
+        while len(self._written) > max(4 * self.max_prompts, 1024):
+            self._written.popitem(last=False)
+
+    def write_seq(self) -> int:
+        """Sequence number to pass to ``put`` for data read after this call."""
+        with self._lock:
+            return self._seq
+
+    def _live(self, prompt_id: UUID) -> Optional[_Entry]:
+        # Caller holds the lock
+        entry = self._data.get(prompt_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry.last_used > self.idle_ttl:
+            del self._data[prompt_id]
+            return None
+        entry.last_used = now
+        self._data.move_to_end(prompt_id)
+        return entry
+
+    def get(self, prompt_id: UUID) -> Optional[PromptHistory]:
+        with self._lock:
+            entry = self._live(prompt_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return PromptHistory(
+                qa_summary=entry.qa_summary,
+                qa_summary_until=entry.qa_summary_until,
+                turns=list(entry.turns),
+                complete=not entry.dropped,
+                **entry.prompt
+            )
+
+    def put(self, prompt: Prompt, turns: List[CrossExam], complete: bool = True, read_seq: Optional[int] = None) -> None:
+        if self.max_prompts <= 0:
+            return
+        entry = _Entry(
+            prompt=dict(
+                prompt_id=prompt.id,
+                session_id=prompt.session_id,
+                prompt_text=prompt.prompt_text,
+                ai_response=prompt.ai_response
+            ),
+            turns=[_turn(qa) for qa in turns],
+            dropped=not complete,
+            qa_summary=prompt.qa_summary,
+            qa_summary_until=prompt.qa_summary_until,
+            max_turns=self.max_turns
+        )
+        with self._lock:
+            if read_seq is not None and self._written.get(prompt.id, 0) > read_seq:
+                return
+            self._data[prompt.id] = entry
+            self._data.move_to_end(prompt.id)
+            while len(self._data) > self.max_prompts:
+                self._data.popitem(last=False)
+
+    def append(self, cross_exam: CrossExam) -> None:
+        """Record a committed turn. Prompts not in the cache are left alone."""
+        with self._lock:
+            self._mark_written(cross_exam.prompt_id)
+            entry = self._live(cross_exam.prompt_id)
+            if entry is None:
+                return
+            if len(entry.turns) == entry.turns.maxlen:
+                entry.dropped = True
+                entry.turns.popleft()
+            # Same order as the keyset pages, even for turns written in the same instant
+            turn = _turn(cross_exam)
+            index = len(entry.turns)
+            while index and position(entry.turns[index - 1]) > position(turn):
+                index -= 1
+            entry.turns.insert(index, turn)
+
+    def set_summary(self, prompt_id: UUID, summary: str, until: datetime) -> None:
+        with self._lock:
+            self._mark_written(prompt_id)
+            entry = self._data.get(prompt_id)
+            if entry is not None:
+                entry.qa_summary = summary
+                entry.qa_summary_until = until
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "prompts": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def invalidate(self, prompt_id: UUID) -> None:
+        with self._lock:
+            self._data.pop(prompt_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _turn(qa: CrossExam) -> dict:
+    return {"id": qa.id, "user_question": qa.user_question, "ai_response": qa.ai_response, "created_at": qa.created_at}
+
+
+history_cache = CrossExamHistoryCache(
+    max_prompts=HISTORY_CACHE_MAX_PROMPTS,
+    idle_ttl=HISTORY_CACHE_IDLE_TTL,
+    max_turns=HISTORY_CACHE_MAX_TURNS
+)
+
+
+def load_prompt_history(db: Session, prompt_id: UUID, cache: CrossExamHistoryCache = history_cache) -> Optional[PromptHistory]:
+    """Read a prompt's history from the database (two queries) and cache it.
+
+    Callers try ``cache.get`` first; this is the miss path.
+    """
+    read_seq = cache.write_seq()
+    prompt = db.get(Prompt, prompt_id)
+    if prompt is None:
+        return None
+    # Newest first so a long history costs one bounded read; the id breaks
+    # ties as it does in the keyset pages (see pagination.py)
+    latest = (
+        db.query(CrossExam)
+        .filter(CrossExam.prompt_id == prompt_id)
+        .order_by(CrossExam.created_at.desc(), CrossExam.id.desc())
+        .limit(cache.max_turns + 1)
+        .all()
+    )
+    complete = len(latest) <= cache.max_turns
+    turns = list(reversed(latest[:cache.max_turns]))
+    cache.put(prompt, turns, complete=complete, read_seq=read_seq)
+    return PromptHistory(
+        prompt_id=prompt.id,
+        session_id=prompt.session_id,
+        prompt_text=prompt.prompt_text,
+        ai_response=prompt.ai_response,
+        qa_summary=prompt.qa_summary,
+        qa_summary_until=prompt.qa_summary_until,
+        turns=[_turn(qa) for qa in turns],
+        complete=complete
+    )
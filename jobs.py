@@ -0,0 +1,283 @@
+import os
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+from models import Job
+from services import get_async_llm, llm_registry
+from cache import CachedLLM
+from prescreen import PrescreenedLLM
+from scheduler import BATCH, llm_priority_scope
+import schemas, crud, analytics
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# A job left "running" this long is assumed orphaned by a dead worker and requeued
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "900"))
+# Seconds between sweeps for such jobs
+JOB_SWEEP_INTERVAL = float(os.getenv("JOB_SWEEP_INTERVAL", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# ---------------------------
+# Job handlers
+# ---------------------------
+# Each handler receives the validated payload and returns a JSON-ready result
+# that is stored on the job row.
+
+def _with_session(fn: Callable[[Session], Any]) -> Any:
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+async def run_analyze_prompt(payload: schemas.PromptCreate) -> dict:
+    llm = CachedLLM(get_async_llm())
+    ai_response = await llm.analyze_prompt(payload.prompt_text)
+
+    def save(db: Session) -> dict:
+        prompt_obj = crud.create_prompt(
+            db,
+            session_id=payload.session_id,
+            prompt_text=payload.prompt_text,
+            ai_response=ai_response
+        )
+        return schemas.PromptOut.model_validate(prompt_obj).model_dump(mode="json")
+
+    return await run_in_threadpool(_with_session, save)
+
+async def run_detect_bias(payload: schemas.BiasInput) -> list:
+    llm = PrescreenedLLM(CachedLLM(get_async_llm()))
+    bias_output = await llm.detect_bias(ai_response=payload.ai_response)
+    if not bias_output.biases:
+        raise ValueError("No biases returned.")
+
+    def save(db: Session) -> list:
+        records = crud.store_bias_insights(db, prompt_id=payload.prompt_id, bias_data=bias_output.biases)
+        return [schemas.BiasInsightOut.model_validate(r).model_dump(mode="json") for r in records]
+
+    return await run_in_threadpool(_with_session, save)
+
+async def run_report(payload: schemas.ReportJobCreate) -> dict:
+    def build(db: Session) -> dict:
+        report_row = crud.rebuild_session_report(db, payload.session_id)
+        if report_row is None:
+            raise ValueError("Session not found.")
+        db.commit()
+        return {"session_id": str(payload.session_id), "etag": report_row.etag}
+
+    return await run_in_threadpool(_with_session, build)
+
+async def run_compact_analytics(payload: schemas.AnalyticsCompactJob) -> dict:
+    if payload.rebuild:
+        return {"rebuilt": await run_in_threadpool(_with_session, analytics.rebuild_rollups)}
+    return {"compacted": await run_in_threadpool(_with_session, analytics.compact_rollups)}
+
+JOB_HANDLERS: Dict[str, tuple] = {
+    "analyze_prompt": (schemas.PromptCreate, run_analyze_prompt),
+    "detect_bias": (schemas.BiasInput, run_detect_bias),
+    "report": (schemas.ReportJobCreate, run_report),
+    "compact_analytics": (schemas.AnalyticsCompactJob, run_compact_analytics),
+}
+
+# ---------------------------
+# Queue operations (sync, run in a threadpool)
+# ---------------------------
+
+def enqueue_job(db: Session, kind: str, payload: Dict[str, Any]) -> Job:
+    """Validate and store a job. Raises ``ValueError`` for unknown kinds or bad payloads."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unsupported job kind: {kind}")
+    payload_schema, _ = JOB_HANDLERS[kind]
+    payload = payload_schema.model_validate(payload).model_dump(mode="json")
+
+    job = Job(id=uuid.uuid4(), kind=kind, status="queued", payload=payload, attempts=0, created_at=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    return job
+
+def get_job(db: Session, job_id: UUID) -> Optional[Job]:
+    return db.get(Job, job_id)
+
+def claim_next_job(db: Session) -> Optional[Job]:
+    """Atomically move the oldest queued job to running, safe across worker processes."""
+    candidates = (
+        db.query(Job.id)
+        .filter(Job.status == "queued")
+        .order_by(Job.created_at)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="running", started_at=datetime.utcnow(), attempts=Job.attempts + 1)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+    return None
+
+def finish_job(db: Session, job_id: UUID, result: Any = None, error: Optional[str] = None) -> None:
+    job = db.get(Job, job_id)
+    job.status = "failed" if error else "succeeded"
+    job.result = result
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+def requeue_stale_jobs(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    stale = db.query(Job).filter(Job.status == "running", Job.started_at < cutoff).all()
+    for job in stale:
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = "Worker lost the job too many times."
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = "queued"
+    db.commit()
+    return len(stale)
+
+# ---------------------------
+# Worker pool
+# ---------------------------
+
+class JobWorker:
+    """Pool of asyncio tasks that drain the ``jobs`` table.
+
+    Runs inside the API process (started from the app lifespan) or on its own
+    via ``python jobs.py``. Workers in the same process are woken immediately
+    on enqueue; other processes pick jobs up on their next poll. The pool also
+    requeues orphaned jobs every JOB_SWEEP_INTERVAL seconds and compacts the
+    analytics rollups every ANALYTICS_COMPACT_INTERVAL seconds.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: list = []
+        self._wakeup = asyncio.Event()
+        self._finished: Dict[UUID, asyncio.Event] = {}
+
+    def start(self) -> None:
+        if self.concurrency <= 0:
+            return
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._requeue_stale()))
+        if analytics.ANALYTICS_COMPACT_INTERVAL > 0:
+            self._tasks.append(asyncio.create_task(self._compact_analytics()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def wait_for(self, job_id: UUID, timeout: float) -> None:
+        """Return when the job finishes here, or after ``timeout`` seconds at most."""
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, self.poll_interval))
+                    return
+                except asyncio.TimeoutError:
+                    # The job may be running in another process; check the table.
+                    job = await run_in_threadpool(_with_session, lambda db: get_job(db, job_id))
+                    if job is None or job.status in ("succeeded", "failed"):
+                        return
+        finally:
+            self._finished.pop(job_id, None)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await run_in_threadpool(_with_session, claim_next_job)
+            except Exception as e:
+                logger.warning("Claiming a job failed: %s", e)
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(job)
+
+    async def _requeue_stale(self) -> None:
+        # A worker process that dies mid-job leaves it "running"; the sweep
+        # must keep going for as long as the pool does, not just at startup
+        while True:
+            try:
+                requeued = await run_in_threadpool(_with_session, requeue_stale_jobs)
+                if requeued:
+                    logger.info("Requeued %d stale jobs", requeued)
+                    self.notify()
+            except Exception as e:
+                logger.warning("Requeueing stale jobs failed: %s", e)
+            await asyncio.sleep(JOB_SWEEP_INTERVAL)
+
+    async def _compact_analytics(self) -> None:
+        while True:
+            await asyncio.sleep(analytics.ANALYTICS_COMPACT_INTERVAL)
+            try:
+                await run_in_threadpool(_with_session, analytics.compact_rollups)
+            except Exception as e:
+                logger.warning("Compacting analytics rollups failed: %s", e)
+
+    async def _execute(self, job: Job) -> None:
+        payload_schema, handler = JOB_HANDLERS[job.kind]
+        result, error = None, None
+        try:
+            with llm_priority_scope(BATCH):
+                result = await handler(payload_schema.model_validate(job.payload))
+        except Exception as e:
+            error = str(e)
+        try:
+            await run_in_threadpool(_with_session, lambda db: finish_job(db, job.id, result=result, error=error))
+        except Exception as e:
+            # The job stays "running" until the stale sweep requeues it
+            logger.warning("Finishing job %s failed: %s", job.id, e)
+
+        event = self._finished.get(job.id)
+        if event is not None:
+            event.set()
+
+
+job_worker = JobWorker()
+
+
+async def main():
+    await llm_registry.startup()
+    job_worker.start()
+    print(f"✅ Job worker running with {job_worker.concurrency} tasks.")
+    try:
+        await asyncio.gather(*job_worker._tasks)
+    finally:
+        await job_worker.stop()
+        await llm_registry.shutdown()
+
+
+if __name__ == "__main__":
+    # Standalone worker process: `JOB_WORKERS=8 python jobs.py`
+    asyncio.run(main())
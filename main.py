@@ -1,12 +1,33 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from routes import router  # assuming routes.py has `router = APIRouter()`
+from services import llm_registry
+from jobs import job_worker
+from database import engine, async_engine
+from cache import llm_cache
+from pdf import pdf_renderer
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+import metrics
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build and pre-warm one pooled client per LLM provider
+    await llm_registry.startup()
+    # In-process job workers; set JOB_WORKERS=0 when running `python jobs.py` separately
+    job_worker.start()
+    yield
+    await job_worker.stop()
+    await llm_registry.shutdown()
+    pdf_renderer.shutdown()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="UnmaskAI API",
     description="Backend for UnmaskAI — Bias detection and analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Allow frontend (Streamlit, React, etc.) to call API
@@ -16,8 +37,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginated listings return the next page's cursor in a header
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Request latency and per-request DB usage, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+REGISTRY.register(metrics.CacheCollector(llm_cache))
+
 # Include all API routes
 app.include_router(router)
 
@@ -26,6 +55,11 @@ app.include_router(router)
 def read_root():
     return {"message": "UnmaskAI API is running."}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Allow running via `python main.py`
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,204 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+# ---------------------------
+# Metric definitions
+# ---------------------------
+# Everything is exposed in Prometheus text format on GET /metrics (see main.py).
+# Routes are labelled by their template (e.g. /jobs/{job_id}), never the raw path.
+
+REQUEST_LATENCY = Histogram(
+    "unmaskai_http_request_duration_seconds",
+    "HTTP request latency, including the streamed body.",
+    ["method", "route", "status"],
+)
+LLM_LATENCY = Histogram(
+    "unmaskai_llm_call_duration_seconds",
+    "LLM call latency per provider and method, including scheduler queueing.",
+    ["provider", "method", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_TOKENS = Counter(
+    "unmaskai_llm_tokens_total",
+    "Tokens billed by the provider, from the API usage data.",
+    ["provider", "method", "kind"],
+)
+DB_QUERIES = Counter(
+    "unmaskai_db_queries_total",
+    "SQL statements executed, per route ('background' outside requests).",
+    ["route"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "unmaskai_db_query_duration_seconds",
+    "Latency of individual SQL statements, per route.",
+    ["route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "unmaskai_db_queries_per_request",
+    "SQL statements executed by one request.",
+    ["route"],
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "unmaskai_db_time_per_request_seconds",
+    "Total time one request spent in SQL statements.",
+    ["route"],
+)
+PDF_RENDER_LATENCY = Histogram(
+    "unmaskai_pdf_render_duration_seconds",
+    "Time to render a session report to PDF, measured in the render worker.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15),
+)
+PDF_PENDING = Gauge(
+    "unmaskai_pdf_renders_pending",
+    "PDF renders queued or running in the process pool.",
+)
+PDF_CACHE_HITS = Counter(
+    "unmaskai_pdf_cache_hits_total",
+    "PDF requests served from the rendered-report cache.",
+)
+PDF_REJECTED = Counter(
+    "unmaskai_pdf_rejected_total",
+    "PDF requests refused with 503 because the render queue was full.",
+)
+BIAS_REUSE = Counter(
+    "unmaskai_bias_reuse_total",
+    "Bias analyses requested with reuse_similar, by whether a near-duplicate was reused.",
+    ["result"],
+)
+PRESCREEN_DECISIONS = Counter(
+    "unmaskai_prescreen_decisions_total",
+    "Lexicon pre-screen verdicts before detect_bias (under 'annotate' the skip is not applied).",
+    ["policy", "decision"],
+)
+PRESCREEN_FALSE_SKIPS = Counter(
+    "unmaskai_prescreen_false_skips_total",
+    "Responses the pre-screen would have skipped but the model scored as biased (annotate policy).",
+)
+
+# ---------------------------
+# Per-request accounting
+# ---------------------------
+
+class RequestStats:
+    """Mutable per-request counters, shared with threadpool and greenlet workers via a contextvar."""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # FastAPI adds the matched route to the scope once routing has happened
+        route = self.scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB usage per route.
+
+    Timing stops once the last body chunk is sent, so streamed responses are
+    measured end to end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route = stats.route
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - start)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_seconds)
+
+# ---------------------------
+# Instrumentation hooks
+# ---------------------------
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement run on a (sync) SQLAlchemy engine.
+
+    For an async engine pass ``async_engine.sync_engine``.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _request_stats.get()
+        route = stats.route if stats is not None else "background"
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        DB_QUERIES.labels(route).inc()
+        DB_QUERY_LATENCY.labels(route).observe(elapsed)
+
+@contextmanager
+def observe_llm_call(provider: str, method: str):
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    except BaseException:
+        # Cancelled by a timeout or a disconnected stream consumer
+        outcome = "cancelled"
+        raise
+    finally:
+        LLM_LATENCY.labels(provider, method, outcome).observe(time.perf_counter() - start)
+
+def record_llm_usage(provider: str, method: str, usage: Any) -> None:
+    if usage is None:
+        return
+    LLM_TOKENS.labels(provider, method, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(provider, method, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+class CacheCollector:
+    """Exposes an ``LLMCache``'s counters and hit rate at scrape time."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        lookups = CounterMetricFamily(
+            "unmaskai_llm_cache_lookups", "LLM cache lookups by result.", labels=["result"]
+        )
+        for result in ("memory_hits", "db_hits", "misses", "bypassed"):
+            lookups.add_metric([result], stats[result])
+        yield lookups
+        yield GaugeMetricFamily("unmaskai_llm_cache_hit_rate", "Share of lookups served from cache.", value=stats["hit_rate"])
+        yield GaugeMetricFamily("unmaskai_llm_cache_memory_entries", "Entries in the in-memory tier.", value=stats["memory_entries"])
@@ -0,0 +1,77 @@
+"""Baseline: tables as created by `python database.py` before migrations existed
+
+Databases created that way should be stamped rather than upgraded:
+`alembic stamp 0001_baseline && alembic upgrade head`.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("created_at", sa.TIMESTAMP()),
+        sa.Column("model_used", sa.String(100)),
+        sa.Column("domain", sa.String(100)),
+    )
+    op.create_table(
+        "prompts",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("session_id", sa.Uuid(), sa.ForeignKey("sessions.id", ondelete="CASCADE")),
+        sa.Column("prompt_text", sa.Text(), nullable=False),
+        sa.Column("ai_response", sa.Text()),
+        sa.Column("created_at", sa.TIMESTAMP()),
+    )
+    op.create_table(
+        "bias_insights",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("prompt_id", sa.Uuid(), sa.ForeignKey("prompts.id", ondelete="CASCADE")),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("score", sa.Float()),
+        sa.Column("insight_summary", sa.Text()),
+    )
+    op.create_table(
+        "cross_exams",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("prompt_id", sa.Uuid(), sa.ForeignKey("prompts.id", ondelete="CASCADE")),
+        sa.Column("user_question", sa.Text(), nullable=False),
+        sa.Column("ai_response", sa.Text()),
+        sa.Column("created_at", sa.TIMESTAMP()),
+    )
+    op.create_table(
+        "perspective_outputs",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("prompt_id", sa.Uuid(), sa.ForeignKey("prompts.id", ondelete="CASCADE")),
+        sa.Column("perspective", sa.String(100), nullable=False),
+        sa.Column("ai_rephrased_output", sa.Text()),
+    )
+    op.create_table(
+        "human_overrides",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("prompt_id", sa.Uuid(), sa.ForeignKey("prompts.id", ondelete="CASCADE")),
+        sa.Column("human_response", sa.Text(), nullable=False),
+        sa.Column("justification", sa.Text()),
+        sa.Column("tags", sa.JSON().with_variant(postgresql.ARRAY(sa.String()), "postgresql")),
+    )
+    op.create_table(
+        "bias_reports",
+        sa.Column("session_id", sa.Uuid(), sa.ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("final_json", sa.JSON()),
+        sa.Column("generated_at", sa.TIMESTAMP()),
+    )
+
+
+def downgrade() -> None:
+    for table in ("bias_reports", "human_overrides", "perspective_outputs", "cross_exams", "bias_insights", "prompts", "sessions"):
+        op.drop_table(table)
@@ -0,0 +1,46 @@
+"""LLM result cache, background jobs and materialized report ETags
+
+Revision ID: 0002_cache_jobs_report_etag
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_cache_jobs_report_etag"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_cache",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("method", sa.String(50), nullable=False),
+        sa.Column("model", sa.String(100)),
+        sa.Column("value", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP()),
+    )
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("result", sa.JSON()),
+        sa.Column("error", sa.Text()),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.TIMESTAMP()),
+        sa.Column("started_at", sa.TIMESTAMP()),
+        sa.Column("finished_at", sa.TIMESTAMP()),
+    )
+    with op.batch_alter_table("bias_reports") as batch:
+        batch.add_column(sa.Column("etag", sa.String(64)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bias_reports") as batch:
+        batch.drop_column("etag")
+    op.drop_table("jobs")
+    op.drop_table("llm_cache")
@@ -0,0 +1,38 @@
+"""Indexes for the hot query paths
+
+Every child table is read by prompt_id, prompts by session_id in creation
+order, cross-exam history by prompt_id in creation order, and the job
+worker claims the oldest queued job. On PostgreSQL the indexes are built
+CONCURRENTLY so existing tables stay writable during the upgrade.
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_cache_jobs_report_etag
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003_hot_path_indexes"
+down_revision = "0002_cache_jobs_report_etag"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_prompts_session_id_created_at", "prompts", ["session_id", "created_at"]),
+    ("ix_bias_insights_prompt_id", "bias_insights", ["prompt_id"]),
+    ("ix_cross_exams_prompt_id_created_at", "cross_exams", ["prompt_id", "created_at"]),
+    ("ix_perspective_outputs_prompt_id", "perspective_outputs", ["prompt_id"]),
+    ("ix_human_overrides_prompt_id", "human_overrides", ["prompt_id"]),
+    ("ix_jobs_status_created_at", "jobs", ["status", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
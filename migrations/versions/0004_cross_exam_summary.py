@@ -0,0 +1,25 @@
+"""Rolling cross-examination summary on prompts
+
+Revision ID: 0004_cross_exam_summary
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_cross_exam_summary"
+down_revision = "0003_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("prompts") as batch:
+        batch.add_column(sa.Column("qa_summary", sa.Text()))
+        batch.add_column(sa.Column("qa_summary_until", sa.TIMESTAMP()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("prompts") as batch:
+        batch.drop_column("qa_summary_until")
+        batch.drop_column("qa_summary")
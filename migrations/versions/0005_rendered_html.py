@@ -0,0 +1,32 @@
+"""Sanitized HTML rendered at write time next to model output
+
+Revision ID: 0005_rendered_html
+Revises: 0004_cross_exam_summary
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_rendered_html"
+down_revision = "0004_cross_exam_summary"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows are filled by `python backfill_html.py`
+    with op.batch_alter_table("prompts") as batch:
+        batch.add_column(sa.Column("ai_response_html", sa.Text()))
+    with op.batch_alter_table("cross_exams") as batch:
+        batch.add_column(sa.Column("ai_response_html", sa.Text()))
+    with op.batch_alter_table("perspective_outputs") as batch:
+        batch.add_column(sa.Column("ai_rephrased_output_html", sa.Text()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("perspective_outputs") as batch:
+        batch.drop_column("ai_rephrased_output_html")
+    with op.batch_alter_table("cross_exams") as batch:
+        batch.drop_column("ai_response_html")
+    with op.batch_alter_table("prompts") as batch:
+        batch.drop_column("ai_response_html")
@@ -0,0 +1,36 @@
+"""Add id to the creation-order indexes for keyset pagination
+
+Session prompt listings and cross-exam history are paged by (created_at, id);
+rows written in one batch share created_at, so the id is part of the sort key.
+Built CONCURRENTLY on PostgreSQL before the old indexes are dropped.
+
+Revision ID: 0006_keyset_indexes
+Revises: 0005_rendered_html
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006_keyset_indexes"
+down_revision = "0005_rendered_html"
+branch_labels = None
+depends_on = None
+
+# (old name, new name, table, leading columns)
+INDEXES = [
+    ("ix_prompts_session_id_created_at", "ix_prompts_session_id_created_at_id", "prompts", ["session_id", "created_at"]),
+    ("ix_cross_exams_prompt_id_created_at", "ix_cross_exams_prompt_id_created_at_id", "cross_exams", ["prompt_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for old, new, table, columns in INDEXES:
+            op.create_index(new, table, columns + ["id"], if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(old, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for old, new, table, columns in INDEXES:
+            op.create_index(old, table, columns, if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(new, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""Near-duplicate response index and reused bias insights
+
+Stored prompts get MinHash signatures with their LSH bands; run
+`python near_duplicates.py` once to index prompts written before this.
+
+Revision ID: 0007_near_duplicate_index
+Revises: 0006_keyset_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_near_duplicate_index"
+down_revision = "0006_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "response_signatures",
+        sa.Column("prompt_id", sa.Uuid(), sa.ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("minhash", sa.LargeBinary(), nullable=False),
+    )
+    op.create_table(
+        "response_signature_bands",
+        sa.Column("band", sa.SmallInteger(), primary_key=True),
+        sa.Column("bucket", sa.BigInteger(), primary_key=True),
+        sa.Column("prompt_id", sa.Uuid(), sa.ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_response_signature_bands_prompt_id", "response_signature_bands", ["prompt_id"])
+    with op.batch_alter_table("bias_insights") as batch:
+        batch.add_column(sa.Column("reused_from_prompt_id", sa.Uuid()))
+        batch.create_foreign_key(
+            "fk_bias_insights_reused_from_prompt_id", "prompts",
+            ["reused_from_prompt_id"], ["id"], ondelete="SET NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bias_insights") as batch:
+        batch.drop_constraint("fk_bias_insights_reused_from_prompt_id", type_="foreignkey")
+        batch.drop_column("reused_from_prompt_id")
+    op.drop_index("ix_response_signature_bands_prompt_id", table_name="response_signature_bands")
+    op.drop_table("response_signature_bands")
+    op.drop_table("response_signatures")
@@ -0,0 +1,41 @@
+"""Bias score rollups for analytics
+
+Insights stored before this are not in the rollups; run
+`python analytics.py --rebuild` once to fill them in.
+
+Revision ID: 0008_bias_score_rollups
+Revises: 0007_near_duplicate_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_bias_score_rollups"
+down_revision = "0007_near_duplicate_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bias_score_rollups",
+        sa.Column("id", sa.Uuid(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("domain", sa.String(100)),
+        sa.Column("model_used", sa.String(100)),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("min_score", sa.Float()),
+        sa.Column("max_score", sa.Float()),
+        sa.Column("histogram", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index(
+        "ix_bias_score_rollups_day_domain_model_used_category", "bias_score_rollups",
+        ["day", "domain", "model_used", "category"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bias_score_rollups_day_domain_model_used_category", table_name="bias_score_rollups")
+    op.drop_table("bias_score_rollups")
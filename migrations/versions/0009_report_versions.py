@@ -0,0 +1,28 @@
+"""Versioned session reports
+
+Writers bump bias_reports.version instead of patching final_json; the report
+is re-rendered on the first read after a change.
+
+Revision ID: 0009_report_versions
+Revises: 0008_bias_score_rollups
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_report_versions"
+down_revision = "0008_bias_score_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("bias_reports") as batch:
+        batch.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+        batch.add_column(sa.Column("rendered_version", sa.Integer()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bias_reports") as batch:
+        batch.drop_column("rendered_version")
+        batch.drop_column("version")
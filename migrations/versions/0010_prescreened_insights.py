@@ -0,0 +1,41 @@
+"""Label bias insights answered by the lexicon pre-screen
+
+Existing pre-screen answers are recognized by their fixed category and
+summary. Run `python analytics.py --rebuild` afterwards to drop them from
+the rollups.
+
+Revision ID: 0010_prescreened_insights
+Revises: 0009_report_versions
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_prescreened_insights"
+down_revision = "0009_report_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("bias_insights") as batch:
+        batch.add_column(sa.Column("prescreened", sa.Boolean(), nullable=False, server_default=sa.false()))
+    insights = sa.table(
+        "bias_insights",
+        sa.column("category", sa.String),
+        sa.column("insight_summary", sa.Text),
+        sa.column("prescreened", sa.Boolean),
+    )
+    op.execute(
+        insights.update()
+        .where(
+            insights.c.category == "None detected",
+            insights.c.insight_summary == "Pre-screen found no bias indicators; model analysis was skipped."
+        )
+        .values(prescreened=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bias_insights") as batch:
+        batch.drop_column("prescreened")
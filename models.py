@@ -1,6 +1,5 @@
 
-from sqlalchemy import Column, String, Text, Float, ForeignKey, JSON, TIMESTAMP, ARRAY
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Float, Integer, Boolean, Date, SmallInteger, BigInteger, LargeBinary, ForeignKey, Index, JSON, TIMESTAMP, ARRAY, Uuid, false
 from sqlalchemy.orm import relationship, declarative_base
 import uuid
 from datetime import datetime
@@ -17,7 +16,7 @@ def create_database(engine):
 class Session(Base):
     __tablename__ = "sessions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
     model_used = Column(String(100))
     domain = Column(String(100))
@@ -31,16 +30,26 @@ class Session(Base):
 # -----------------------------
 class Prompt(Base):
     __tablename__ = "prompts"
+    __table_args__ = (
+        # Session listing/report: filter by session, keyset-ordered by (created_at, id)
+        Index("ix_prompts_session_id_created_at_id", "session_id", "created_at", "id"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"))
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id = Column(Uuid(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"))
     prompt_text = Column(Text, nullable=False)
     ai_response = Column(Text)
+    # Sanitized HTML of ai_response, rendered once on write
+    ai_response_html = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    # Rolling summary of the cross-exam turns created up to qa_summary_until;
+    # later turns are sent to the model verbatim
+    qa_summary = Column(Text)
+    qa_summary_until = Column(TIMESTAMP)
 
     # Relationships
     session = relationship("Session", back_populates="prompts")
-    bias_insights = relationship("BiasInsight", back_populates="prompt", cascade="all, delete-orphan")
+    bias_insights = relationship("BiasInsight", back_populates="prompt", cascade="all, delete-orphan", foreign_keys="BiasInsight.prompt_id")
     cross_exams = relationship("CrossExam", back_populates="prompt", cascade="all, delete-orphan")
     perspectives = relationship("PerspectiveOutput", back_populates="prompt", cascade="all, delete-orphan")
     human_override = relationship("HumanOverride", back_populates="prompt", uselist=False, cascade="all, delete-orphan")
@@ -52,15 +61,24 @@ class Prompt(Base):
 class BiasInsight(Base):
     __tablename__ = "bias_insights"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    prompt_id = Column(UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"))
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    prompt_id = Column(Uuid(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), index=True)
     category = Column(String(100), nullable=False)
     score = Column(Float)
     #highlighted_terms = Column(JSON)
     insight_summary = Column(Text)
+    # Set when the row was copied from a near-duplicate response's analysis
+    # instead of coming from the model (see near_duplicates.py)
+    reused_from_prompt_id = Column(
+        Uuid(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="SET NULL", name="fk_bias_insights_reused_from_prompt_id")
+    )
+    # Set when the lexicon pre-screen answered instead of the model (see
+    # prescreen.py); such rows are kept out of the analytics rollups
+    prescreened = Column(Boolean, nullable=False, default=False, server_default=false())
 
     # Relationships
-    prompt = relationship("Prompt", back_populates="bias_insights")
+    prompt = relationship("Prompt", back_populates="bias_insights", foreign_keys=[prompt_id])
 
 
 # -----------------------------
@@ -68,11 +86,16 @@ class BiasInsight(Base):
 # -----------------------------
 class CrossExam(Base):
     __tablename__ = "cross_exams"
+    __table_args__ = (
+        # Q&A history: filter by prompt, keyset-ordered by (created_at, id)
+        Index("ix_cross_exams_prompt_id_created_at_id", "prompt_id", "created_at", "id"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    prompt_id = Column(UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"))
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    prompt_id = Column(Uuid(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"))
     user_question = Column(Text, nullable=False)
     ai_response = Column(Text)
+    ai_response_html = Column(Text)
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
 
     # Relationships
@@ -85,10 +108,11 @@ class CrossExam(Base):
 class PerspectiveOutput(Base):
     __tablename__ = "perspective_outputs"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    prompt_id = Column(UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"))
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    prompt_id = Column(Uuid(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), index=True)
     perspective = Column(String(100), nullable=False)
     ai_rephrased_output = Column(Text)
+    ai_rephrased_output_html = Column(Text)
 
     # Relationships
     prompt = relationship("Prompt", back_populates="perspectives")
@@ -100,22 +124,109 @@ class PerspectiveOutput(Base):
 class HumanOverride(Base):
     __tablename__ = "human_overrides"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    prompt_id = Column(UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"))
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    prompt_id = Column(Uuid(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), index=True)
     human_response = Column(Text, nullable=False)
     justification = Column(Text)
-    tags = Column(ARRAY(String))
+    # Native array on PostgreSQL, JSON list elsewhere (e.g. SQLite for local runs)
+    tags = Column(JSON().with_variant(ARRAY(String), "postgresql"))
 
     # Relationships
     prompt = relationship("Prompt", back_populates="human_override")
 
 
+# -----------------------------
+# Near-duplicate Response Index
+# -----------------------------
+class ResponseSignature(Base):
+    __tablename__ = "response_signatures"
+
+    prompt_id = Column(Uuid(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True)
+    # Packed 32-bit MinHash values of the prompt's ai_response
+    minhash = Column(LargeBinary, nullable=False)
+
+
+class ResponseSignatureBand(Base):
+    __tablename__ = "response_signature_bands"
+    __table_args__ = (
+        Index("ix_response_signature_bands_prompt_id", "prompt_id"),
+    )
+
+    # LSH lookup: responses sharing any (band, bucket) are near-duplicate candidates
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    prompt_id = Column(Uuid(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True)
+
+
+# -----------------------------
+# Bias Score Rollups (see analytics.py)
+# -----------------------------
+class BiasScoreRollup(Base):
+    __tablename__ = "bias_score_rollups"
+    __table_args__ = (
+        # Analytics: range over days, then the dimensions rows are merged by
+        Index("ix_bias_score_rollups_day_domain_model_used_category", "day", "domain", "model_used", "category"),
+    )
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    day = Column(Date, nullable=False)
+    domain = Column(String(100))
+    model_used = Column(String(100))
+    category = Column(String(100), nullable=False)
+    count = Column(Integer, nullable=False)
+    total = Column(Float, nullable=False)
+    min_score = Column(Float)
+    max_score = Column(Float)
+    # Packed 32-bit counts of scores per histogram bin
+    histogram = Column(LargeBinary, nullable=False)
+
+
 # -----------------------------
 # Bias Reports Table (optional)
 # -----------------------------
 class BiasReport(Base):
     __tablename__ = "bias_reports"
 
-    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True)
+    session_id = Column(Uuid(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True)
+    # Bumped by every write to the session; the ETag derives from it
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Rendered report and the version it reflects; stale while behind `version`
     final_json = Column(JSON)
+    rendered_version = Column(Integer)
+    etag = Column(String(64))
     generated_at = Column(TIMESTAMP, default=datetime.utcnow)
+
+
+# -----------------------------
+# LLM Result Cache Table
+# -----------------------------
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)
+    method = Column(String(50), nullable=False)
+    model = Column(String(100))
+    value = Column(JSON, nullable=False)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+
+
+# -----------------------------
+# Background Jobs Table
+# -----------------------------
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Worker claim: oldest queued job first
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
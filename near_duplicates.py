@@ -0,0 +1,204 @@
+import os
+import re
+import random
+import hashlib
+import argparse
+from array import array
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.orm import Session
+from models import *
+
+# -----------------------------
+# Near-duplicate AI responses
+# -----------------------------
+# Audit corpora repeat the same answer with a different date, name or spacing,
+# which the exact-match LLM cache never sees as equal. Every stored
+# Prompt.ai_response gets a MinHash signature over its word shingles; the
+# signature is split into LSH bands stored in response_signature_bands, so
+# responses sharing any band are found with one indexed lookup. Candidates are
+# then confirmed by their estimated Jaccard similarity.
+#
+# Changing the shingle size or the band layout invalidates stored signatures;
+# run `python near_duplicates.py --all` afterwards.
+
+# Estimated Jaccard similarity at which a stored analysis is reused
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+# Candidates (by shared bands) whose full signatures are compared
+NEAR_DUP_MAX_CANDIDATES = int(os.getenv("NEAR_DUP_MAX_CANDIDATES", "20"))
+
+SHINGLE_SIZE = 3
+BANDS, ROWS = 16, 8
+# 16 bands of 8 rows make a pair at Jaccard 0.85 a candidate ~99% of the time
+# and a pair at 0.5 under 7% of the time
+NUM_PERM = BANDS * ROWS
+
+_MASK64 = (1 << 64) - 1
+_rng = random.Random(20261018)
+# Fixed, so signatures are comparable across processes and restarts
+_PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+def normalize(text: str) -> List[str]:
+    """Lowercased word tokens with every number collapsed, so dates and counts don't count as changes."""
+    return re.findall(r"\w+", re.sub(r"\d+", "0", text.lower()))
+
+def shingles(text: str) -> List[int]:
+    tokens = normalize(text)
+    if len(tokens) <= SHINGLE_SIZE:
+        grams = {" ".join(tokens)}
+    else:
+        grams = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return [_hash64(gram.encode("utf-8")) for gram in grams]
+
+def minhash(text: str) -> List[int]:
+    """32-bit MinHash signature of ``text`` (NUM_PERM values)."""
+    hashes = shingles(text)
+    return [min(((a * h + b) & _MASK64) >> 32 for h in hashes) for a, b in _PERMUTATIONS]
+
+def band_buckets(signature: List[int]) -> List[int]:
+    # Signed, to fit a BIGINT column
+    return [
+        _hash64(array("I", signature[band * ROWS:(band + 1) * ROWS]).tobytes()) - (1 << 63)
+        for band in range(BANDS)
+    ]
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+def pack(signature: List[int]) -> bytes:
+    return array("I", signature).tobytes()
+
+def unpack(data: bytes) -> List[int]:
+    return array("I", data).tolist()
+
+def response_signature(text: Optional[str]) -> Optional[List[int]]:
+    """MinHash of a response to store, or None for an empty one (never indexed).
+
+    CPU-bound (milliseconds for a long response); request handlers compute it
+    in the threadpool and hand it to the crud writer.
+    """
+    if not text or not text.strip():
+        return None
+    return minhash(text)
+
+def response_signatures(texts: List[Optional[str]]) -> List[Optional[List[int]]]:
+    return [response_signature(text) for text in texts]
+
+def signature_rows(prompt_id: UUID, signature: Optional[List[int]]) -> Tuple[List[dict], List[dict]]:
+    """Rows for response_signatures and response_signature_bands (both empty without a signature)."""
+    if signature is None:
+        return [], []
+    return (
+        [dict(prompt_id=prompt_id, minhash=pack(signature))],
+        [dict(prompt_id=prompt_id, band=band, bucket=bucket) for band, bucket in enumerate(band_buckets(signature))]
+    )
+
+def index_responses(
+    db: Session, responses: List[Tuple[UUID, Optional[str]]], mark_blank: bool = False,
+    signatures: Optional[List[Optional[List[int]]]] = None
+) -> None:
+    """Store signatures for ``(prompt_id, ai_response)`` pairs; the prompts must already be flushed.
+
+    ``signatures`` are the responses' ``response_signature`` values, in order;
+    they are computed here when not given. ``mark_blank`` stores an empty
+    signature for blank responses so a rebuild doesn't revisit them; they
+    never match anything.
+    """
+    if signatures is None:
+        signatures = response_signatures([text for _, text in responses])
+    signature_list, bands = [], []
+    for (prompt_id, _), signature in zip(responses, signatures):
+        sig_rows, band_rows = signature_rows(prompt_id, signature)
+        if not sig_rows and mark_blank:
+            sig_rows = [dict(prompt_id=prompt_id, minhash=b"")]
+        signature_list.extend(sig_rows)
+        bands.extend(band_rows)
+    if signature_list:
+        db.execute(insert(ResponseSignature), signature_list)
+    if bands:
+        db.execute(insert(ResponseSignatureBand), bands)
+
+# -----------------------------
+# Lookup
+# -----------------------------
+
+def bands_match(buckets: List[int]):
+    # OR of (band, bucket) pairs rather than a row-value IN: both PostgreSQL
+    # and SQLite turn it into one primary-key probe per band
+    return or_(*(
+        and_(ResponseSignatureBand.band == band, ResponseSignatureBand.bucket == bucket)
+        for band, bucket in enumerate(buckets)
+    ))
+
+def find_near_duplicates(
+    db: Session, signature: List[int], threshold: float, exclude: Optional[UUID] = None
+) -> List[Tuple[UUID, float]]:
+    """Stored responses at or above ``threshold``, most similar first."""
+    shared = func.count().label("shared")
+    query = (
+        select(ResponseSignatureBand.prompt_id, shared)
+        .where(bands_match(band_buckets(signature)))
+        .group_by(ResponseSignatureBand.prompt_id)
+        .order_by(shared.desc())
+        .limit(NEAR_DUP_MAX_CANDIDATES)
+    )
+    if exclude is not None:
+        query = query.where(ResponseSignatureBand.prompt_id != exclude)
+    candidates = db.execute(query).scalars().all()
+    if not candidates:
+        return []
+    stored = db.execute(
+        select(ResponseSignature.prompt_id, ResponseSignature.minhash)
+        .where(ResponseSignature.prompt_id.in_(candidates))
+    ).all()
+    matches = [(prompt_id, similarity(signature, unpack(data))) for prompt_id, data in stored]
+    return sorted((m for m in matches if m[1] >= threshold), key=lambda m: m[1], reverse=True)
+
+# -----------------------------
+# Rebuild
+# -----------------------------
+
+def rebuild_signatures(db: Session, batch_size: int = 500, rebuild_all: bool = False) -> int:
+    """Compute signatures for stored prompts, one commit per batch.
+
+    By default only prompts without a signature are processed; ``rebuild_all``
+    drops the index first, e.g. after changing SHINGLE_SIZE or the band layout.
+    """
+    if rebuild_all:
+        db.query(ResponseSignatureBand).delete()
+        db.query(ResponseSignature).delete()
+        db.commit()
+    count = 0
+    while True:
+        rows = db.execute(
+            select(Prompt.id, Prompt.ai_response)
+            .outerjoin(ResponseSignature, ResponseSignature.prompt_id == Prompt.id)
+            .where(ResponseSignature.prompt_id.is_(None), Prompt.ai_response.is_not(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        index_responses(db, rows, mark_blank=True)
+        db.commit()
+        count += len(rows)
+    return count
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+    parser = argparse.ArgumentParser(description="Build the near-duplicate index for stored AI responses.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true", help="Drop and rebuild every signature")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"✅ {rebuild_signatures(db, args.batch_size, args.all)} responses indexed")
+    finally:
+        db.close()
@@ -0,0 +1,52 @@
+import os
+import json
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+# ---------------------------
+# Keyset pagination
+# ---------------------------
+# Listings are ordered by (created_at, id) and resume strictly after the last row
+# a client saw, so each page is one bounded index range scan however deep it is.
+# The id breaks ties between rows written in the same batch. The cursor handed
+# to clients (X-Next-Cursor) is that position, opaque and URL-safe.
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+Position = Tuple[datetime, UUID]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position: Position) -> str:
+    created_at, row_id = position
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Position]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed pagination cursor.") from e
+
+def position(item: Any) -> Position:
+    """Sort key of an ORM row or a cached dict row."""
+    if isinstance(item, dict):
+        return item["created_at"], item["id"]
+    return item.created_at, item.id
+
+def split_page(items: List, limit: int) -> Tuple[List, Optional[str]]:
+    """Trim a ``limit + 1`` fetch to one page plus the cursor of the next, if any."""
+    if len(items) <= limit:
+        return items, None
+    page = items[:limit]
+    return page, encode_cursor(position(page[-1]))
@@ -0,0 +1,158 @@
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+# Kept light on purpose: pool workers are spawned processes that import this
+# module, so the template and PDF stack are only loaded inside _render_pdf.
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_NAME = "unmaskai_report.html"
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+# Renders queued or running at once; beyond this requests get a 503
+PDF_MAX_PENDING = int(os.getenv("PDF_MAX_PENDING", "8"))
+PDF_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", "64"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class PDFQueueFull(Exception):
+    """Raised when ``PDF_MAX_PENDING`` renders are already in progress."""
+
+
+# ---------------------------
+# Worker process side
+# ---------------------------
+
+_template = None
+
+def _init_worker() -> None:
+    # Compile the template once per worker process. Stored *_html fields are
+    # sanitized and marked |safe in the template; everything else is escaped.
+    global _template
+    from jinja2 import Environment, FileSystemLoader
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+    _template = env.get_template(TEMPLATE_NAME)
+
+def _render_pdf(report: dict) -> Tuple[bytes, float]:
+    """Render a materialized report to PDF bytes; returns the bytes and render seconds."""
+    from weasyprint import HTML
+    start = time.perf_counter()
+    report = {**report, "created_at": datetime.fromisoformat(report["created_at"]) if report.get("created_at") else None}
+    html_content = _template.render(report=report)
+    pdf_bytes = HTML(string=html_content, base_url=TEMPLATE_DIR).write_pdf()
+    return pdf_bytes, time.perf_counter() - start
+
+# ---------------------------
+# API process side
+# ---------------------------
+
+class PDFRenderer:
+    """Bounded process pool for report PDFs, with a cache keyed by report ETag.
+
+    Rendering never runs on the event loop or in the request threadpool. Requests
+    for a report version that is already rendering wait for that render instead
+    of starting another. The pool starts on first use, so workers that never
+    serve a PDF never pay for it.
+    """
+
+    def __init__(self, workers: int, max_pending: int, cache_entries: int, cache_bytes: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.cache_entries = cache_entries
+        self.cache_bytes = cache_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "PDFRenderer":
+        return cls(PDF_WORKERS, PDF_MAX_PENDING, PDF_CACHE_MAX_ENTRIES, PDF_CACHE_MAX_BYTES)
+
+    @property
+    def pending(self) -> int:
+        return len(self._in_flight)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Forking a process that runs an event loop and threads isn't safe
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            return self._pool
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        pdf_bytes = self._cache.get(key)
+        if pdf_bytes is not None:
+            self._cache.move_to_end(key)
+        return pdf_bytes
+
+    def _cache_put(self, key: str, pdf_bytes: bytes) -> None:
+        if self.cache_entries <= 0 or len(pdf_bytes) > self.cache_bytes:
+            return
+        self._cache[key] = pdf_bytes
+        self._cached_bytes += len(pdf_bytes)
+        while len(self._cache) > self.cache_entries or self._cached_bytes > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    async def render(self, etag: str, report: dict) -> bytes:
+        """PDF bytes for one version of a report. Raises ``PDFQueueFull`` under back-pressure."""
+        import metrics
+        pdf_bytes = self._cache_get(etag)
+        if pdf_bytes is not None:
+            metrics.PDF_CACHE_HITS.inc()
+            return pdf_bytes
+
+        task = self._in_flight.get(etag)
+        if task is None:
+            if self.pending >= self.max_pending:
+                metrics.PDF_REJECTED.inc()
+                raise PDFQueueFull("PDF renderer is at capacity.")
+            # Not tied to the request: a client that disconnects doesn't waste
+            # the render, and the result still lands in the cache.
+            task = asyncio.ensure_future(self._render(etag, report))
+            self._in_flight[etag] = task
+            metrics.PDF_PENDING.set(self.pending)
+            task.add_done_callback(lambda t: self._finished(etag, t))
+        return await asyncio.shield(task)
+
+    async def _render(self, etag: str, report: dict) -> bytes:
+        import metrics
+        try:
+            pdf_bytes, seconds = await asyncio.get_running_loop().run_in_executor(self._get_pool(), _render_pdf, report)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge report); start a fresh pool next time
+            self.shutdown(wait=False)
+            raise
+        metrics.PDF_RENDER_LATENCY.observe(seconds)
+        self._cache_put(etag, pdf_bytes)
+        return pdf_bytes
+
+    def _finished(self, etag: str, task: asyncio.Future) -> None:
+        import metrics
+        self._in_flight.pop(etag, None)
+        metrics.PDF_PENDING.set(self.pending)
+        if not task.cancelled():
+            # Mark the error retrieved when every waiter has gone away
+            task.exception()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+pdf_renderer = PDFRenderer.from_env()
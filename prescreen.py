@@ -0,0 +1,217 @@
+import os
+import re
+import math
+import logging
+from typing import Dict, List, Optional
+import schemas
+import metrics
+from services import AsyncLLMBase
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Lexicon bias pre-screen
+# ---------------------------
+# A cheap in-process pass over a response before it goes to detect_bias. Term
+# tables per bias category are compiled into a single regex, so a response is
+# scanned once in C however many terms there are; each match is attributed to
+# its (category, weight) through the named group it hit. Recipes, code and
+# other plainly neutral text score ~0 and need not reach the model at all.
+#
+# Policies (PRESCREEN_POLICY):
+#   off      - every response goes to the model
+#   annotate - every response goes to the model; the screen's verdict is logged
+#              and compared with the model's in metrics (shadow mode, to tune
+#              PRESCREEN_THRESHOLD before turning skipping on)
+#   skip     - responses scoring below PRESCREEN_THRESHOLD in every category
+#              are answered locally without a model call
+
+PRESCREEN_POLICY = os.getenv("PRESCREEN_POLICY", "off")
+PRESCREEN_THRESHOLD = float(os.getenv("PRESCREEN_THRESHOLD", "0.2"))
+# A model score at or above this counts as "biased" when measuring agreement
+PRESCREEN_LLM_BIAS_SCORE = float(os.getenv("PRESCREEN_LLM_BIAS_SCORE", "0.5"))
+
+# Weights: a mention of a group or topic, loaded language about it, and a
+# sweeping generalization about a group
+MENTION, LOADED, GENERALIZATION = 1.0, 2.5, 4.0
+
+# category -> weight -> regex alternatives (matched case-insensitively on word boundaries).
+# Mentions are kept to words that name a group or a partisan topic; everyday
+# words that merely can ("man page", "race condition", "native code", "leader
+# election") would push neutral technical text over the threshold.
+LEXICON: Dict[str, Dict[float, List[str]]] = {
+    "Gender": {
+        MENTION: [r"wom[ae]n", r"men", r"girls", r"females?", r"males?", r"gender", r"mothers?", r"fathers?",
+                  r"wi(?:fe|ves)", r"husbands?", r"ladies", r"transgender", r"feminis[mt]s?"],
+        LOADED: [r"hysterical", r"bossy", r"emotional(?:ly)? unstable", r"man up", r"like a girl", r"weaker sex",
+                 r"naturally (?:nurturing|aggressive|better|worse)", r"women belong", r"real m[ae]n"],
+    },
+    "Political": {
+        MENTION: [r"democrats?", r"republicans?", r"liberals?", r"conservatives?", r"left[- ]wing", r"right[- ]wing",
+                  r"progressives?", r"politic(?:s|al|ians?)", r"partisan", r"socialis[mt]s?", r"capitalis[mt]s?", r"voters"],
+        LOADED: [r"radical left", r"far[- ]right", r"libtards?", r"snowflakes?", r"fascists?", r"commies?",
+                 r"woke", r"propaganda", r"regime", r"brainwashed"],
+    },
+    "Cultural": {
+        MENTION: [r"cultur(?:e|es|al)", r"traditions?", r"immigrants?", r"foreigners?", r"westerners",
+                  r"ethnic(?:ity)?", r"native (?:people|peoples|americans)", r"indigenous", r"civiliz(?:ed|ation)"],
+        LOADED: [r"backward", r"primitive", r"uncivilized", r"exotic", r"savages?", r"third[- ]world",
+                 r"illegals?", r"barbaric"],
+    },
+    "Racial": {
+        MENTION: [r"racial", r"black people", r"white people", r"asians?", r"africans?", r"hispanics?",
+                  r"latin[oax]s?", r"caucasians?", r"arabs?", r"minorit(?:y|ies)", r"people of colou?r"],
+        LOADED: [r"racially inferior", r"thugs?", r"ghetto", r"urban youth", r"model minority", r"race mixing",
+                 r"articulate for"],
+    },
+    "Religious": {
+        MENTION: [r"religio(?:n|ns|us)", r"christians?", r"christianity", r"muslims?", r"islam(?:ic)?", r"jews?",
+                  r"jewish", r"hindus?", r"buddhists?", r"atheists?", r"church(?:es)?", r"mosques?", r"faith"],
+        LOADED: [r"infidels?", r"heretics?", r"godless", r"fanatics?", r"extremists?", r"cults?", r"heathens?"],
+    },
+    "Economic": {
+        MENTION: [r"the poor", r"poor people", r"poverty", r"the rich", r"rich people", r"wealthy", r"working class",
+                  r"middle class", r"welfare", r"inequality", r"homeless(?:ness)?", r"elites?", r"billionaires?"],
+        LOADED: [r"lazy poor", r"freeloaders?", r"handouts?", r"welfare queens?", r"moochers?", r"parasites?",
+                 r"trailer trash", r"deserve(?:s)? to be poor"],
+    },
+    "Ideological": {
+        MENTION: [r"ideolog(?:y|ies|ical)", r"worldview", r"dogma"],
+        LOADED: [r"obviously", r"everyone knows", r"no (?:sane|reasonable) person", r"undeniabl[ey]",
+                 r"the only (?:right|correct|sensible) (?:way|view|answer)", r"common sense says"],
+    },
+}
+
+# Sweeping statements about a group; the group decides the category. Only
+# plural group nouns count: "the government should" is policy, not a stereotype.
+GROUPS: Dict[str, List[str]] = {
+    "Gender": [r"wom[ae]n", r"men", r"girls", r"boys", r"females", r"males", r"mothers", r"fathers", r"wives",
+               r"husbands", r"ladies", r"feminists"],
+    "Political": [r"democrats", r"republicans", r"liberals", r"conservatives", r"progressives", r"leftists",
+                  r"politicians", r"socialists", r"capitalists", r"voters"],
+    "Cultural": [r"immigrants", r"foreigners", r"westerners", r"natives", r"indigenous people"],
+    "Racial": [r"black people", r"white people", r"asians", r"africans", r"hispanics", r"latin[oax]s",
+               r"caucasians", r"arabs", r"minorities", r"people of colou?r"],
+    "Religious": [r"christians", r"muslims", r"jews", r"hindus", r"buddhists", r"atheists"],
+    "Economic": [r"the poor", r"poor people", r"the rich", r"rich people", r"the wealthy", r"elites",
+                 r"billionaires", r"homeless people"],
+}
+_GENERALIZATION_LEAD = r"(?:all|most|every|typical|those|these|such)"
+_GENERALIZATION_TAIL = r"(?:are|always|never|can't|cannot|should|tend to|just)"
+
+
+def _compile(lexicon: Dict[str, Dict[float, List[str]]], groups: Dict[str, List[str]]):
+    """One case-insensitive regex over every term, plus group name -> (category, weight)."""
+    tables = []
+    for category, tiers in lexicon.items():
+        for weight, terms in tiers.items():
+            tables.append((category, weight, "|".join(terms)))
+    for category, nouns in groups.items():
+        nouns = "|".join(nouns)
+        tables.append((category, GENERALIZATION, (
+            f"{_GENERALIZATION_LEAD}\\s+(?:{nouns})\\b|(?:{nouns})\\s+{_GENERALIZATION_TAIL}"
+        )))
+    # Alternation takes the first branch that matches, so heavier tables go
+    # first: "women belong" must count as loaded language, not a mention
+    tables.sort(key=lambda table: table[1], reverse=True)
+    groups = {f"g{i}": (category, weight) for i, (category, weight, _) in enumerate(tables)}
+    alternatives = "|".join(f"(?P<g{i}>{terms})" for i, (_, _, terms) in enumerate(tables))
+    return re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE), groups
+
+_PATTERN, _GROUPS = _compile(LEXICON, GROUPS)
+
+
+class ScreenResult:
+    """Per-category scores in [0, 1] and the matched phrases behind them."""
+
+    def __init__(self, scores: Dict[str, float], matches: Dict[str, List[str]]):
+        self.scores = scores
+        self.matches = matches
+
+    @property
+    def max_score(self) -> float:
+        return max(self.scores.values(), default=0.0)
+
+    @property
+    def top_category(self) -> Optional[str]:
+        return max(self.scores, key=self.scores.get) if self.scores else None
+
+
+def screen(text: str) -> ScreenResult:
+    """Score ``text`` against the lexicon in one regex pass."""
+    weights: Dict[str, float] = {}
+    matches: Dict[str, List[str]] = {}
+    for match in _PATTERN.finditer(text):
+        category, weight = _GROUPS[match.lastgroup]
+        weights[category] = weights.get(category, 0.0) + weight
+        matches.setdefault(category, []).append(match.group(0))
+    # Long texts mention more terms in passing; damp by length so density counts
+    damping = 1.5 * (1 + len(text) / 2000)
+    scores = {category: 1 - math.exp(-weight / damping) for category, weight in weights.items()}
+    return ScreenResult(scores, matches)
+
+def neutral_output(result: ScreenResult) -> schemas.BiasDetectionOutput:
+    """What a skipped response is answered with instead of the model's analysis."""
+    return schemas.BiasDetectionOutput(biases=[schemas.PrescreenedBiasItem(
+        category="None detected",
+        score=round(result.max_score, 3),
+        insight_summary="Pre-screen found no bias indicators; model analysis was skipped."
+    )])
+
+# ---------------------------
+# Pipeline stage
+# ---------------------------
+
+class PrescreenedLLM(AsyncLLMBase):
+    """Wraps an ``AsyncLLMBase`` so ``detect_bias`` runs the lexicon screen first.
+
+    Every other call passes straight through.
+    """
+
+    def __init__(self, llm: AsyncLLMBase, policy: str = PRESCREEN_POLICY, threshold: float = PRESCREEN_THRESHOLD):
+        if policy not in ("off", "annotate", "skip"):
+            raise ValueError(f"Unknown PRESCREEN_POLICY: {policy}")
+        self.llm = llm
+        self.policy = policy
+        self.threshold = threshold
+
+    async def detect_bias(self, ai_response: str) -> schemas.BiasDetectionOutput:
+        if self.policy == "off":
+            return await self.llm.detect_bias(ai_response)
+
+        result = screen(ai_response)
+        below = result.max_score < self.threshold
+        metrics.PRESCREEN_DECISIONS.labels(self.policy, "skip" if below else "forward").inc()
+        if below and self.policy == "skip":
+            return neutral_output(result)
+
+        output = await self.llm.detect_bias(ai_response)
+        if self.policy == "annotate":
+            llm_max = max((item.score for item in output.biases), default=0.0)
+            if below and llm_max >= PRESCREEN_LLM_BIAS_SCORE:
+                # Skipping would have hidden a bias the model found
+                metrics.PRESCREEN_FALSE_SKIPS.inc()
+            logger.info(
+                "prescreen max=%.2f top=%s llm_max=%.2f would_skip=%s",
+                result.max_score, result.top_category, llm_max, below
+            )
+        return output
+
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        return await self.llm.analyze_prompt(prompt_text)
+
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        return await self.llm.reframe_perspective(prompt_text, perspective)
+
+    async def cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> str:
+        return await self.llm.cross_examine(user_prompt, ai_initial_response, user_question, previous_qa, history_summary)
+
+    async def summarize_cross_exam(self, previous_summary: Optional[str], turns: List[dict]) -> str:
+        return await self.llm.summarize_cross_exam(previous_summary, turns)
@@ -0,0 +1,81 @@
+import sys
+import uuid
+from datetime import date, datetime
+from typing import List, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.engine import Engine
+from models import *
+import crud, near_duplicates
+
+# -----------------------------
+# Hot query paths
+# -----------------------------
+# The statements the API runs on every request. Each must be answerable from an
+# index; `python query_plans.py` fails if the planner falls back to a full scan.
+# Statements with filters of their own come from the builders crud runs, so the
+# check can't drift from what the app issues.
+
+def hot_queries() -> List[Tuple[str, object]]:
+    some_id = uuid.uuid4()
+    return [
+        ("prompts by session", select(Prompt).where(Prompt.session_id == some_id).order_by(Prompt.created_at)),
+        ("bias insights by prompt", select(BiasInsight).where(BiasInsight.prompt_id == some_id)),
+        ("cross-exams by prompt", select(CrossExam).where(CrossExam.prompt_id == some_id).order_by(CrossExam.created_at)),
+        ("perspectives by prompt", select(PerspectiveOutput).where(PerspectiveOutput.prompt_id == some_id)),
+        ("override by prompt", select(HumanOverride).where(HumanOverride.prompt_id == some_id)),
+        ("unsummarized cross-exam history", crud.unsummarized_cross_exams_query(some_id, datetime(2000, 1, 1))),
+        ("cross-exam page", crud.cross_exams_page_query(some_id, (datetime(2000, 1, 1), some_id), 101)),
+        ("session prompts page", crud.session_prompts_page_query(some_id, (datetime(2000, 1, 1), some_id), 101)),
+        ("near-duplicate candidates", (
+            select(ResponseSignatureBand.prompt_id)
+            .where(near_duplicates.bands_match([1, 2, 3]))
+        )),
+        ("bias analytics range", (
+            select(BiasScoreRollup)
+            .where(BiasScoreRollup.day >= date(2000, 1, 1), BiasScoreRollup.day <= date(2000, 1, 31))
+        )),
+        ("next queued job", select(Job.id).where(Job.status == "queued").order_by(Job.created_at).limit(5)),
+    ]
+
+def _postgres_seq_scans(conn, sql: str) -> List[str]:
+    # Seq scans are always "cheapest" on small tables; disabling them makes the
+    # planner reveal whether an index path exists at all.
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()[0]["Plan"]
+    found, stack = [], [plan]
+    while stack:
+        node = stack.pop()
+        if node["Node Type"] == "Seq Scan":
+            found.append(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+    return found
+
+def _sqlite_seq_scans(conn, sql: str) -> List[str]:
+    found = []
+    for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")):
+        detail = row[-1]
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            found.append(detail.split()[1])
+    return found
+
+def check_query_plans(engine: Engine) -> List[str]:
+    """Return one message per hot query that scans a whole table."""
+    failures = []
+    explain = _postgres_seq_scans if engine.dialect.name == "postgresql" else _sqlite_seq_scans
+    for name, stmt in hot_queries():
+        sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+        with engine.begin() as conn:
+            tables = explain(conn, sql)
+        if tables:
+            failures.append(f"{name}: sequential scan on {', '.join(tables)}")
+    return failures
+
+
+if __name__ == "__main__":
+    from database import engine
+    failures = check_query_plans(engine)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ All hot queries use an index.")
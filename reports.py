@@ -0,0 +1,113 @@
+import gzip
+import json
+import hashlib
+import threading
+from typing import List, Optional, Tuple
+import brotli
+import nh3
+
+# Bodies smaller than this are sent uncompressed; the framing overhead isn't worth it.
+COMPRESSION_MIN_BYTES = 1024
+
+# ---------------------------
+# Report assembly
+# ---------------------------
+
+# Model output is rendered to HTML once, when its row is written (see crud), and
+# stored next to the raw text. Building a Markdown instance is the expensive part,
+# so each thread keeps one and resets it between documents.
+_markdown = threading.local()
+
+def render_markdown(text: Optional[str]) -> Optional[str]:
+    """Markdown to sanitized HTML, safe to embed in the report unescaped."""
+    if not text:
+        return text
+    converter = getattr(_markdown, "converter", None)
+    if converter is None:
+        # Imported on first use; read-only workers never load it
+        import markdown
+        converter = _markdown.converter = markdown.Markdown()
+    return nh3.clean(converter.reset().convert(text))
+
+def stored_html(html: Optional[str], text: Optional[str]) -> Optional[str]:
+    # Rows written before the *_html columns existed are rendered on the fly
+    # until `python backfill_html.py` has run.
+    return html if html is not None else render_markdown(text)
+
+def bias_entry(b) -> dict:
+    entry = {"category": b.category, "score": b.score, "summary": b.insight_summary}
+    if b.reused_from_prompt_id:
+        entry["reused_from_prompt_id"] = str(b.reused_from_prompt_id)
+    if b.prescreened:
+        entry["prescreened"] = True
+    return entry
+
+def cross_exam_entry(q) -> dict:
+    return {"user_question": q.user_question, "ai_response": stored_html(q.ai_response_html, q.ai_response)}
+
+def perspective_entry(p) -> dict:
+    return {"perspective": p.perspective, "ai_rephrased_output": stored_html(p.ai_rephrased_output_html, p.ai_rephrased_output)}
+
+def override_entry(o) -> dict:
+    return {"human_response": o.human_response, "justification": o.justification, "tags": o.tags}
+
+def prompt_report(prompt) -> dict:
+    """JSON-ready report entry for one ``models.Prompt`` and its children."""
+    return {
+        "id": str(prompt.id),
+        "created_at": prompt.created_at.isoformat() if prompt.created_at else None,
+        "prompt_text": prompt.prompt_text,
+        "ai_response": stored_html(prompt.ai_response_html, prompt.ai_response),
+        "bias_insights": [bias_entry(b) for b in prompt.bias_insights],
+        "cross_exams": [cross_exam_entry(q) for q in sorted(prompt.cross_exams, key=lambda q: q.created_at)],
+        "perspectives": [perspective_entry(p) for p in prompt.perspectives],
+        "human_override": override_entry(prompt.human_override) if prompt.human_override else None
+    }
+
+def session_header(session) -> dict:
+    return {
+        "session_id": str(session.id),
+        "model_used": session.model_used,
+        "domain": session.domain,
+        "created_at": session.created_at.isoformat() if session.created_at else None,
+    }
+
+def session_report(session, prompts: Optional[List] = None) -> dict:
+    prompts = session.prompts if prompts is None else prompts
+    return {
+        **session_header(session),
+        "prompts": [prompt_report(p) for p in sorted(prompts, key=lambda p: p.created_at)]
+    }
+
+# ---------------------------
+# Serialization, ETags and compression
+# ---------------------------
+
+def dump_report(report: dict) -> bytes:
+    return json.dumps(report, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def ndjson_line(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def version_etag(session_id, version: int) -> str:
+    # Known without rendering, so a conditional GET is one indexed lookup
+    return hashlib.sha256(f"{session_id}:{version}".encode()).hexdigest()[:32]
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/").strip('"') == etag for tag in candidates
+    )
+
+def compress(body: bytes, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+    """Compress ``body`` with the best encoding the client accepts (br > gzip)."""
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return body, None
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if "br" in accepted:
+        return brotli.compress(body, quality=5), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
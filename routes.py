@@ -1,130 +1,599 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session as DBSession
-from database import get_db
-import schemas, crud
-from typing import List, Optional
-from fastapi.responses import FileResponse
-from tempfile import NamedTemporaryFile
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from services import get_llm
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db, AsyncSessionLocal, SessionLocal
+import schemas, crud, reports, pagination, near_duplicates, analytics
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+import asyncio
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from services import AsyncLLMBase, get_async_llm
+from cache import CachedLLM, cache_bypass_requested, llm_cache
+from history_cache import PromptHistory, history_cache, load_prompt_history
+from pdf import PDFQueueFull, pdf_renderer
+from prescreen import PrescreenedLLM
+from scheduler import BATCH, LLMRateLimitError, llm_priority_scope
+import jobs
+import metrics
 from models import *
 from uuid import UUID
-from textwrap import wrap
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from tempfile import NamedTemporaryFile
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
-from tempfile import NamedTemporaryFile
-import markdown
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+# Concurrent model calls per batch request (clients may ask for less or more, up to the max)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+# Longest a client may block on GET /jobs/{job_id}?wait=
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))
+# Seconds allowed for each reframe in a multi-perspective request
+PERSPECTIVE_TIMEOUT = float(os.getenv("PERSPECTIVE_TIMEOUT", "30"))
+# Cross-exam turns sent verbatim; older ones are folded into the prompt's rolling
+# summary, CROSS_EXAM_SUMMARY_BATCH turns at a time
+CROSS_EXAM_RECENT_TURNS = int(os.getenv("CROSS_EXAM_RECENT_TURNS", "4"))
+CROSS_EXAM_SUMMARY_BATCH = int(os.getenv("CROSS_EXAM_SUMMARY_BATCH", "2"))
+# Prompts loaded per round trip when streaming an NDJSON report
+REPORT_STREAM_BATCH = int(os.getenv("REPORT_STREAM_BATCH", "50"))
+
 @router.post("/sessions", response_model=schemas.SessionOut)
 def create_session(payload: schemas.SessionCreate, db: DBSession = Depends(get_db)):
     return crud.create_session(db, model_used=payload.model_used, domain=payload.domain)
 
+def get_prompt_or_404(db: DBSession, prompt_id: UUID) -> Prompt:
+    prompt_obj = db.query(Prompt).filter(Prompt.id == prompt_id).first()
+    if not prompt_obj:
+        raise HTTPException(status_code=404, detail="Prompt not found.")
+    return prompt_obj
+
+async def get_history_or_404(db: AsyncSession, prompt_id: UUID) -> PromptHistory:
+    # Active prompts are served from memory; the database is read on a miss only
+    history = history_cache.get(prompt_id)
+    if history is None:
+        history = await db.run_sync(load_prompt_history, prompt_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Prompt not found.")
+    return history
+
+def llm_http_error(e: Exception, prefix: str) -> HTTPException:
+    # Provider throttling that outlasted the scheduler's retries is the client's
+    # cue to back off, not a server fault.
+    if isinstance(e, LLMRateLimitError):
+        headers = {"Retry-After": str(int(e.retry_after or 1))}
+        return HTTPException(status_code=429, detail=f"{prefix}: {str(e)}", headers=headers)
+    return HTTPException(status_code=500, detail=f"{prefix}: {str(e)}")
+
+def get_cached_llm(request: Request) -> AsyncLLMBase:
+    # Send `X-Cache-Bypass: 1` (or `Cache-Control: no-cache`) to force a fresh
+    # model call; that skips the bias pre-screen as well
+    bypass = cache_bypass_requested(request.headers)
+    llm = CachedLLM(get_async_llm(), bypass=bypass)
+    return llm if bypass else PrescreenedLLM(llm)
+
+# LLM-backed handlers are coroutines: the model call is awaited on the event
+# loop. Cheap reads run on the async engine through AsyncSession.run_sync,
+# which executes on the loop thread. Writers (and report rendering) run in the
+# threadpool on a session of their own, via run_crud, because they do CPU work:
+# Markdown rendering and sanitizing, MinHash signatures, rollups.
+
+async def run_crud(fn: Callable, *args, **kwargs):
+    """Call the sync crud function ``fn(db, *args, **kwargs)`` in the threadpool."""
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await run_in_threadpool(call)
+
 @router.post("/prompts/get-ai-response", response_model=schemas.PromptOut)
-def create_prompt(payload: schemas.PromptCreate, db: DBSession = Depends(get_db)):
+async def create_prompt(payload: schemas.PromptCreate, llm: AsyncLLMBase = Depends(get_cached_llm)):
     # Get GPT-4o response using services
-    llm = get_llm("openai")
     try:
-        ai_response = llm.analyze_prompt(payload.prompt_text)
+        ai_response = await llm.analyze_prompt(payload.prompt_text)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM Error: {str(e)}")
+        raise llm_http_error(e, "LLM Error")
 
-    return crud.create_prompt(
-        db=db,
+    # MinHash is CPU-bound; computed in the threadpool, not in the writer
+    signature = await run_in_threadpool(near_duplicates.response_signature, ai_response)
+    return await run_crud(
+        crud.create_prompt,
         session_id=payload.session_id,
         prompt_text=payload.prompt_text,
-        ai_response=ai_response
+        ai_response=ai_response,
+        signature=signature
     )
 
+@router.post("/prompts/batch", response_model=schemas.PromptBatchOut)
+async def create_prompts_batch(payload: schemas.PromptBatchCreate, llm: AsyncLLMBase = Depends(get_cached_llm)):
+    semaphore = asyncio.Semaphore(min(payload.concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+
+    async def analyze(prompt_text: str) -> str:
+        async with semaphore:
+            return await llm.analyze_prompt(prompt_text)
+
+    # One failed item must not abort the rest of the batch; batch calls yield
+    # to interactive ones in the LLM scheduler.
+    with llm_priority_scope(BATCH):
+        outcomes = await asyncio.gather(
+            *(analyze(text) for text in payload.prompt_texts),
+            return_exceptions=True
+        )
+
+    succeeded = [
+        (index, text, outcome)
+        for index, (text, outcome) in enumerate(zip(payload.prompt_texts, outcomes))
+        if not isinstance(outcome, BaseException)
+    ]
+
+    def save(db: DBSession) -> List[schemas.PromptOut]:
+        prompt_objs = crud.create_prompts_bulk(
+            db,
+            session_id=payload.session_id,
+            items=[(text, ai_response) for _, text, ai_response in succeeded],
+            signatures=signatures
+        )
+        return [schemas.PromptOut.model_validate(p) for p in prompt_objs]
+
+    signatures = await run_in_threadpool(
+        near_duplicates.response_signatures, [ai_response for _, _, ai_response in succeeded]
+    )
+
+    saved = await run_crud(save) if succeeded else []
+
+    results = [
+        schemas.PromptBatchItem(index=index, error=f"LLM Error: {str(outcome)}")
+        for index, outcome in enumerate(outcomes)
+        if isinstance(outcome, BaseException)
+    ]
+    results += [
+        schemas.PromptBatchItem(index=index, prompt=prompt_out)
+        for (index, _, _), prompt_out in zip(succeeded, saved)
+    ]
+    results.sort(key=lambda item: item.index)
+
+    return schemas.PromptBatchOut(
+        session_id=payload.session_id,
+        succeeded=len(succeeded),
+        failed=len(payload.prompt_texts) - len(succeeded),
+        results=results
+    )
+
+@router.post("/audits", response_model=schemas.AuditOut)
+async def run_full_audit(payload: schemas.AuditCreate, llm: AsyncLLMBase = Depends(get_cached_llm)):
+    # Reframing needs only the prompt, so perspectives start right away alongside
+    # the analysis; bias detection starts as soon as the analysis returns.
+    analysis = asyncio.create_task(llm.analyze_prompt(payload.prompt_text))
+    reframes = [
+        asyncio.create_task(llm.reframe_perspective(payload.prompt_text, perspective))
+        for perspective in payload.perspectives
+    ]
+
+    async def detect_bias():
+        return await llm.detect_bias(ai_response=await analysis)
+
+    bias = asyncio.create_task(detect_bias())
+
+    try:
+        ai_response = await analysis
+    except Exception as e:
+        for task in reframes + [bias]:
+            task.cancel()
+        await asyncio.gather(*reframes, bias, return_exceptions=True)
+        raise llm_http_error(e, "LLM Error")
+
+    bias_outcome, *reframe_outcomes = await asyncio.gather(bias, *reframes, return_exceptions=True)
+
+    errors = {}
+    bias_data = []
+    if isinstance(bias_outcome, BaseException):
+        errors["bias_insights"] = f"Bias detection failed: {str(bias_outcome)}"
+    else:
+        bias_data = bias_outcome.biases
+
+    perspectives = []
+    for perspective, outcome in zip(payload.perspectives, reframe_outcomes):
+        if isinstance(outcome, BaseException):
+            errors[f"perspective:{perspective}"] = f"Reframing failed: {str(outcome)}"
+        else:
+            perspectives.append((perspective, outcome))
+
+    def save(db: DBSession) -> schemas.AuditOut:
+        prompt_obj, insights, outputs = crud.create_audit(
+            db,
+            session_id=payload.session_id,
+            prompt_text=payload.prompt_text,
+            ai_response=ai_response,
+            bias_data=bias_data,
+            perspectives=perspectives,
+            signature=signature
+        )
+        return schemas.AuditOut(
+            prompt=schemas.PromptOut.model_validate(prompt_obj),
+            bias_insights=[schemas.BiasInsightOut.model_validate(i) for i in insights],
+            perspectives=[schemas.PerspectiveOut.model_validate(p) for p in outputs],
+            errors=errors
+        )
+
+    signature = await run_in_threadpool(near_duplicates.response_signature, ai_response)
+    return await run_crud(save)
+
 @router.post("/bias-insights", response_model=List[schemas.BiasInsightOut])
-def generate_bias_insights(payload: schemas.BiasInput, db: DBSession = Depends(get_db)):
-    llm = get_llm("openai")
+async def generate_bias_insights(payload: schemas.BiasInput, llm: AsyncLLMBase = Depends(get_cached_llm)):
+    if payload.reuse_similar:
+        threshold = payload.similarity_threshold
+        if threshold is None:
+            threshold = near_duplicates.NEAR_DUP_THRESHOLD
+        signature = await run_in_threadpool(near_duplicates.minhash, payload.ai_response)
+        reused = await run_crud(crud.reuse_bias_insights, payload.prompt_id, signature, threshold)
+        metrics.BIAS_REUSE.labels("reused" if reused else "no_match").inc()
+        if reused:
+            return reused
+
     try:
-        bias_output = llm.detect_bias(ai_response=payload.ai_response)
+        bias_output = await llm.detect_bias(ai_response=payload.ai_response)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Bias detection failed: {str(e)}")
+        raise llm_http_error(e, "Bias detection failed")
 
     bias_data = bias_output.biases
     if not bias_data:
         raise HTTPException(status_code=422, detail="No biases returned.")
 
-    return crud.store_bias_insights(db, prompt_id=payload.prompt_id, bias_data=bias_data)
+    return await run_crud(crud.store_bias_insights, prompt_id=payload.prompt_id, bias_data=bias_data)
+
+async def refresh_cross_exam_summary(prompt_id: UUID) -> None:
+    """Fold turns older than the verbatim window into the prompt's rolling summary.
+
+    Runs after the response is sent. Only the new turns and the previous summary
+    go to the model, so the cost doesn't grow with the length of the exam.
+    """
+    async with AsyncSessionLocal() as db:
+        prompt_obj = await db.get(Prompt, prompt_id)
+        if prompt_obj is None:
+            return
+        turns = await db.run_sync(crud.get_unsummarized_cross_exams, prompt_id, prompt_obj.qa_summary_until)
+        if len(turns) < CROSS_EXAM_RECENT_TURNS + CROSS_EXAM_SUMMARY_BATCH:
+            return
+        fold = turns[:len(turns) - CROSS_EXAM_RECENT_TURNS]
+        try:
+            with llm_priority_scope(BATCH):
+                summary = await get_async_llm().summarize_cross_exam(
+                    prompt_obj.qa_summary,
+                    [{"user_question": qa.user_question, "ai_response": qa.ai_response} for qa in fold]
+                )
+        except Exception as e:
+            # The turns stay unsummarized and are retried after the next question
+            logger.warning("Summarizing cross-exam for prompt %s failed: %s", prompt_id, e)
+            return
+        await run_crud(
+            crud.update_cross_exam_summary, prompt_id, summary,
+            until=fold[-1].created_at, expected_until=prompt_obj.qa_summary_until
+        )
 
 @router.post("/cross-exams", response_model=schemas.CrossExamOut)
-def create_cross_exam(payload: schemas.CrossExamCreate, db: DBSession = Depends(get_db)):
-    llm = get_llm("openai")
+async def create_cross_exam(payload: schemas.CrossExamCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    llm = get_async_llm()
 
-    # Get original prompt text from DB
-    prompt_obj = db.query(Prompt).filter(Prompt.id == payload.prompt_id).first()
-    if not prompt_obj:
-        raise HTTPException(status_code=404, detail="Prompt not found.")
-    
-    # Get previous Q&A from DB for this session
-    session_id = prompt_obj.session_id
-    qa_log = db.query(CrossExam).join(Prompt).filter(
-        Prompt.session_id == session_id
-    ).order_by(CrossExam.created_at.desc()).limit(5).all()
-
-    qa_log = list(reversed(qa_log))
-
-    previous_qa = [
-        {"user_question": qa.user_question, "ai_response": qa.ai_response}
-        for qa in qa_log
-    ]
-    print(previous_qa)
+    # Original prompt plus its latest Q&A; earlier turns come from its rolling summary
+    prompt_obj = await get_history_or_404(db, payload.prompt_id)
+    previous_qa = prompt_obj.recent_turns(CROSS_EXAM_RECENT_TURNS + CROSS_EXAM_SUMMARY_BATCH)
 
     try:
-        ai_response = llm.cross_examine(
+        ai_response = await llm.cross_examine(
         user_prompt=prompt_obj.prompt_text,
         ai_initial_response=prompt_obj.ai_response,
         user_question=payload.user_question,
-        previous_qa=previous_qa
+        previous_qa=previous_qa,
+        history_summary=prompt_obj.qa_summary
         )   
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cross-exam failed: {str(e)}")
+        raise llm_http_error(e, "Cross-exam failed")
 
-    return crud.create_cross_exam(
-        db=db,
+    cross_exam = await run_crud(
+        crud.create_cross_exam,
         prompt_id=payload.prompt_id,
         user_question=payload.user_question,
         ai_response=ai_response
     )
+    background_tasks.add_task(refresh_cross_exam_summary, payload.prompt_id)
+    return cross_exam
+
+def decode_cursor_or_400(cursor: Optional[str]) -> Optional[pagination.Position]:
+    try:
+        return pagination.decode_cursor(cursor)
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def page_response(response: Response, items: List, limit: int) -> List:
+    # Fetched limit + 1 rows; the extra one only tells us another page exists
+    page, next_cursor = pagination.split_page(items, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return page
 
 @router.get("/prompts/get-cross-exams-qa", response_model=List[schemas.CrossExamListItem])
-def list_cross_exams(prompt_id: UUID, db: DBSession = Depends(get_db)):
-    cross_exams = crud.get_cross_exams_by_prompt(db, prompt_id)
-    return cross_exams
+def list_cross_exams(
+    prompt_id: UUID,
+    response: Response,
+    limit: int = Query(pagination.PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    after = decode_cursor_or_400(cursor)
+    history = history_cache.get(prompt_id) or load_prompt_history(db, prompt_id)
+    if history is None:
+        return []
+    # The cache holds the newest turns; it can answer any page that starts inside them
+    if history.complete or (after is not None and history.turns and after >= pagination.position(history.turns[0])):
+        turns = [qa for qa in history.turns if after is None or pagination.position(qa) > after]
+        return page_response(response, turns[:limit + 1], limit)
+    cross_exams = crud.get_cross_exams_page(db, prompt_id, after, limit + 1)
+    return page_response(response, cross_exams, limit)
 
+@router.get("/sessions/{session_id}/prompts", response_model=List[schemas.PromptOut])
+def list_session_prompts(
+    session_id: UUID,
+    response: Response,
+    limit: int = Query(pagination.PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    after = decode_cursor_or_400(cursor)
+    prompts = crud.get_session_prompts_page(db, session_id, after, limit + 1)
+    if not prompts and after is None and db.get(Session, session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return page_response(response, prompts, limit)
 
-@router.post("/perspectives", response_model=schemas.PerspectiveOut)
-def reframe_perspective(payload: schemas.PerspectiveCreate, db: DBSession = Depends(get_db)):
-    prompt_obj = db.query(Prompt).filter(Prompt.id == payload.prompt_id).first()
-    if not prompt_obj:
-        raise HTTPException(status_code=404, detail="Prompt not found.")
 
-    llm = get_llm("openai")
+@router.post("/perspectives", response_model=schemas.PerspectiveOut)
+async def reframe_perspective(payload: schemas.PerspectiveCreate, db: AsyncSession = Depends(get_async_db), llm: AsyncLLMBase = Depends(get_cached_llm)):
+    prompt_obj = await db.run_sync(get_prompt_or_404, payload.prompt_id)
 
     try:
-        rewritten = llm.reframe_perspective(
+        rewritten = await llm.reframe_perspective(
             prompt_text=prompt_obj.prompt_text,
             perspective=payload.perspective
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Reframing failed: {str(e)}")
+        raise llm_http_error(e, "Reframing failed")
 
-    return crud.create_perspective_output(
-        db=db,
+    return await run_crud(
+        crud.create_perspective_output,
         prompt_id=payload.prompt_id,
         perspective=payload.perspective,
         ai_rephrased_output=rewritten
     )
 
+# -----------------------------
+# Server-sent-event streaming
+# -----------------------------
+# Each stream emits `data: {"token": ...}` events as the model produces text,
+# then a final `event: done` carrying the stored row (or `event: error`).
+# Rows are persisted once the completion is whole, through run_crud: the
+# request's session is closed before the body is sent.
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def save_with_new_session(writer: Callable, out_schema, **kwargs) -> dict:
+    obj = await run_crud(writer, **kwargs)
+    return out_schema.model_validate(obj).model_dump(mode="json")
+
+async def stream_and_save(
+    tokens: AsyncIterator[str],
+    error_prefix: str,
+    save: Callable[[str], Awaitable[dict]]
+) -> AsyncIterator[str]:
+    chunks = []
+    try:
+        async for token in tokens:
+            chunks.append(token)
+            yield sse_event({"token": token})
+    except Exception as e:
+        yield sse_event({"detail": f"{error_prefix}: {str(e)}"}, event="error")
+        return
+
+    try:
+        saved = await save("".join(chunks))
+    except Exception as e:
+        yield sse_event({"detail": f"Saving failed: {str(e)}"}, event="error")
+        return
+    yield sse_event(saved, event="done")
+
+@router.post("/prompts/get-ai-response/stream")
+async def stream_prompt(payload: schemas.PromptCreate):
+    llm = get_async_llm()
+
+    async def save(ai_response: str) -> dict:
+        return await save_with_new_session(
+            crud.create_prompt, schemas.PromptOut,
+            session_id=payload.session_id,
+            prompt_text=payload.prompt_text,
+            ai_response=ai_response,
+            signature=await run_in_threadpool(near_duplicates.response_signature, ai_response)
+        )
+
+    events = stream_and_save(llm.stream_analyze_prompt(payload.prompt_text), "LLM Error", save)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/cross-exams/stream")
+async def stream_cross_exam(payload: schemas.CrossExamCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    llm = get_async_llm()
+
+    prompt_obj = await get_history_or_404(db, payload.prompt_id)
+    previous_qa = prompt_obj.recent_turns(CROSS_EXAM_RECENT_TURNS + CROSS_EXAM_SUMMARY_BATCH)
+
+    tokens = llm.stream_cross_examine(
+        user_prompt=prompt_obj.prompt_text,
+        ai_initial_response=prompt_obj.ai_response,
+        user_question=payload.user_question,
+        previous_qa=previous_qa,
+        history_summary=prompt_obj.qa_summary
+    )
+
+    async def save(ai_response: str) -> dict:
+        return await save_with_new_session(
+            crud.create_cross_exam, schemas.CrossExamOut,
+            prompt_id=payload.prompt_id,
+            user_question=payload.user_question,
+            ai_response=ai_response
+        )
+
+    events = stream_and_save(tokens, "Cross-exam failed", save)
+    # Runs once the stream has finished and the turn is stored
+    background_tasks.add_task(refresh_cross_exam_summary, payload.prompt_id)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/perspectives/stream")
+async def stream_perspective(payload: schemas.PerspectiveCreate, db: AsyncSession = Depends(get_async_db)):
+    llm = get_async_llm()
+
+    prompt_obj = await db.run_sync(get_prompt_or_404, payload.prompt_id)
+    tokens = llm.stream_reframe_perspective(
+        prompt_text=prompt_obj.prompt_text,
+        perspective=payload.perspective
+    )
+
+    async def save(rewritten: str) -> dict:
+        return await save_with_new_session(
+            crud.create_perspective_output, schemas.PerspectiveOut,
+            prompt_id=payload.prompt_id,
+            perspective=payload.perspective,
+            ai_rephrased_output=rewritten
+        )
+
+    events = stream_and_save(tokens, "Reframing failed", save)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/perspectives/batch")
+async def reframe_perspectives(payload: schemas.PerspectiveBatchCreate, db: AsyncSession = Depends(get_async_db), llm: AsyncLLMBase = Depends(get_cached_llm)):
+    prompt_obj = await db.run_sync(get_prompt_or_404, payload.prompt_id)
+    prompt_text = prompt_obj.prompt_text
+
+    async def reframe(perspective: str) -> tuple:
+        try:
+            rewritten = await asyncio.wait_for(
+                llm.reframe_perspective(prompt_text=prompt_text, perspective=perspective),
+                timeout=PERSPECTIVE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return perspective, None, f"Reframing timed out after {PERSPECTIVE_TIMEOUT:g}s"
+        except Exception as e:
+            return perspective, None, f"Reframing failed: {str(e)}"
+        return perspective, rewritten, None
+
+    async def save(items: List[tuple]) -> List[dict]:
+        objs = await run_crud(crud.create_perspective_outputs_bulk, prompt_id=payload.prompt_id, items=items)
+        return [schemas.PerspectiveOut.model_validate(o).model_dump(mode="json") for o in objs]
+
+    # Emits `event: perspective` per reframe in completion order, then one
+    # `event: done` with every stored row after a single bulk insert.
+    async def events() -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(reframe(p)) for p in payload.perspectives]
+        completed = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                perspective, rewritten, error = await next_done
+                if error:
+                    yield sse_event({"perspective": perspective, "detail": error}, event="perspective")
+                else:
+                    completed.append((perspective, rewritten))
+                    yield sse_event({"perspective": perspective, "ai_rephrased_output": rewritten}, event="perspective")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        try:
+            saved = await save(completed) if completed else []
+        except Exception as e:
+            yield sse_event({"detail": f"Saving failed: {str(e)}"}, event="error")
+            return
+        yield sse_event({"perspectives": saved}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# -----------------------------
+# Bias analytics
+# -----------------------------
+# Served from the score rollups (see analytics.py), never from bias_insights.
+
+def bias_aggregates(
+    db: DBSession, start: Optional[date], end: Optional[date], group_by: List[str], percentiles: List[float],
+    domain: Optional[str], model_used: Optional[str], category: Optional[str]
+) -> List[dict]:
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=analytics.ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end.")
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 100.")
+    return analytics.aggregate(
+        db, start, end, group_by=list(dict.fromkeys(group_by)), percentiles=percentiles,
+        domain=domain, model_used=model_used, category=category
+    )
+
+@router.get("/analytics/bias", response_model=List[schemas.BiasAggregateOut])
+def get_bias_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: List[analytics.Dimension] = Query(["category"]),
+    percentiles: List[float] = Query([50, 90, 99]),
+    domain: Optional[str] = None,
+    model_used: Optional[str] = None,
+    category: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    # Defaults to the last ANALYTICS_DEFAULT_DAYS days, one row per category
+    return bias_aggregates(db, start, end, group_by, percentiles, domain, model_used, category)
+
+@router.get("/analytics/bias/trend", response_model=List[schemas.BiasAggregateOut])
+def get_bias_trend(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: List[analytics.Dimension] = Query(["category"]),
+    percentiles: List[float] = Query([50, 90, 99]),
+    domain: Optional[str] = None,
+    model_used: Optional[str] = None,
+    category: Optional[str] = None,
+    db: DBSession = Depends(get_db)
+):
+    # Same as /analytics/bias with one row per day for every group
+    return bias_aggregates(db, start, end, ["day", *group_by], percentiles, domain, model_used, category)
+
+# -----------------------------
+# Background jobs
+# -----------------------------
+
+@router.post("/jobs", response_model=schemas.JobOut, status_code=202)
+def create_job(payload: schemas.JobCreate, db: DBSession = Depends(get_db)):
+    try:
+        job = jobs.enqueue_job(db, kind=payload.kind, payload=payload.payload)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    jobs.job_worker.notify()
+    return job
+
+@router.get("/jobs/{job_id}", response_model=schemas.JobOut)
+async def get_job(job_id: UUID, wait: float = 0, db: AsyncSession = Depends(get_async_db)):
+    # With ?wait=N the request long-polls until the job finishes or N seconds pass
+    job = await db.run_sync(jobs.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    if wait > 0 and job.status not in ("succeeded", "failed"):
+        await jobs.job_worker.wait_for(job_id, timeout=min(wait, JOB_MAX_WAIT))
+        await db.refresh(job)
+
+    return job
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return {**llm_cache.stats(), "history": history_cache.stats()}
+
 @router.post("/human-overrides", response_model=schemas.HumanOverrideOut)
 def create_human_override(payload: schemas.HumanOverrideCreate, db: DBSession = Depends(get_db)):
     # Check that the prompt exists
@@ -140,77 +609,75 @@ def create_human_override(payload: schemas.HumanOverrideCreate, db: DBSession =
         tags=payload.tags
     )
 
-env = Environment(loader=FileSystemLoader("templates"))
+def iter_ndjson_report(session_id: UUID) -> Iterator[bytes]:
+    # A sync generator: Starlette pulls it from the threadpool, and the session
+    # stays open (holding the server-side cursor) until the last line is sent.
+    with SessionLocal() as db:
+        session = db.get(Session, session_id)
+        yield reports.ndjson_line({"type": "session", **reports.session_header(session)})
+        for prompt in crud.iter_session_prompts(db, session_id, REPORT_STREAM_BATCH):
+            yield reports.ndjson_line({"type": "prompt", **reports.prompt_report(prompt)})
 
 @router.get("/sessions/report")
-def generate_bias_report(session_id: UUID, format: Optional[str] = None, db: DBSession = Depends(get_db)):
-    session = db.query(Session).filter(Session.id == session_id).first()
-    if not session:
+async def generate_bias_report(session_id: UUID, request: Request, format: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    if format == "ndjson":
+        # Read straight from the tables, one prompt per line, so memory stays
+        # flat and the first byte goes out before the whole session is read
+        if await db.get(Session, session_id) is None:
+            raise HTTPException(status_code=404, detail="Session not found.")
+        return StreamingResponse(
+            iter_ndjson_report(session_id),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    # Conditional requests are answered from the version alone, before rendering
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        version = await db.run_sync(crud.get_report_version, session_id)
+        if version is not None:
+            etag = reports.version_etag(session_id, version) + ("-pdf" if format == "pdf" else "")
+            if reports.etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+
+    report_row = await run_crud(crud.get_session_report, session_id)
+    if not report_row:
         raise HTTPException(status_code=404, detail="Session not found.")
 
-    prompt_objs = db.query(Prompt).filter(Prompt.session_id == session_id).all()
-    prompt_reports = []
-
-    for prompt in prompt_objs:
-        biases = db.query(BiasInsight).filter(BiasInsight.prompt_id == prompt.id).all()
-        cross_exams = db.query(CrossExam).filter(CrossExam.prompt_id == prompt.id).all()
-        perspectives = db.query(PerspectiveOutput).filter(PerspectiveOutput.prompt_id == prompt.id).all()
-        human_override = db.query(HumanOverride).filter(HumanOverride.prompt_id == prompt.id).first()
-
-        prompt_reports.append({
-            "id": prompt.id,
-            "prompt_text": prompt.prompt_text,
-            "ai_response": prompt.ai_response,
-            "bias_insights": [
-                {
-                    "category": b.category,
-                    "score": b.score,
-                    "summary": b.insight_summary
-                } for b in biases
-            ],
-            "cross_exams": [
-                {
-                    "user_question": q.user_question,
-                    "ai_response": q.ai_response
-                } for q in cross_exams
-            ],
-            "perspectives": [
-                {
-                    "perspective": p.perspective,
-                    "ai_rephrased_output": p.ai_rephrased_output
-                } for p in perspectives
-            ],
-            "human_override": (
-                {
-                    "human_response": human_override.human_response,
-                    "justification": human_override.justification,
-                    "tags": human_override.tags
-                } if human_override else None
-            )
-        })
-
-    full_report = {
-        "session_id": session.id,
-        "model_used": session.model_used,
-        "domain": session.domain,
-        "created_at": session.created_at,
-        "prompts": prompt_reports
-        }
+    full_report = report_row.final_json
 
-    for prompt in full_report["prompts"]:
-        prompt["ai_response"] = markdown.markdown(prompt["ai_response"])
-        for qa in prompt["cross_exams"]:
-            qa["ai_response"] = markdown.markdown(qa["ai_response"])
-        for p in prompt["perspectives"]:
-            p["ai_rephrased_output"] = markdown.markdown(p["ai_rephrased_output"])
+    if format != "pdf":
+        headers = {
+            "ETag": f'"{report_row.etag}"',
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+        if reports.etag_matches(request.headers.get("if-none-match"), report_row.etag):
+            return Response(status_code=304, headers=headers)
 
-        if format != "pdf":
-            return full_report
-    
-    template = env.get_template("unmaskai_report.html")
-    html_content = template.render(report=full_report)
+        body, encoding = await run_in_threadpool(
+            lambda: reports.compress(reports.dump_report(full_report), request.headers.get("accept-encoding", ""))
+        )
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
 
-    tmp = NamedTemporaryFile(delete=False, suffix=".pdf")
-    HTML(string=html_content).write_pdf(tmp.name)
+    # The PDF is a different representation of the same report version
+    pdf_etag = f"{report_row.etag}-pdf"
+    headers = {
+        "ETag": f'"{pdf_etag}"',
+        "Cache-Control": "no-cache",
+        "Content-Disposition": 'attachment; filename="unmaskai_report.pdf"'
+    }
+    if reports.etag_matches(request.headers.get("if-none-match"), pdf_etag):
+        return Response(status_code=304, headers=headers)
 
-    return FileResponse(tmp.name, media_type="application/pdf", filename="unmaskai_report.pdf")
+    try:
+        pdf_bytes = await pdf_renderer.render(report_row.etag, full_report)
+    except PDFQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="PDF rendering is busy. Please retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
@@ -0,0 +1,255 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, Type
+
+# ---------------------------
+# Priorities
+# ---------------------------
+# Lower value is served first. Request handlers run as INTERACTIVE by default;
+# batch endpoints and background jobs wrap their work in llm_priority_scope(BATCH).
+
+INTERACTIVE = 0
+BATCH = 1
+
+llm_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+@contextmanager
+def llm_priority_scope(priority: int):
+    token = llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        llm_priority.reset(token)
+
+# HTTP statuses worth retrying; 429 additionally shrinks the concurrency window.
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMRateLimitError(Exception):
+    """Raised when a call is still throttled by the provider after all retries."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(messages: List[dict], max_tokens: int) -> int:
+    """Rough budget for one call: ~4 characters per prompt token plus the completion cap."""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class _Bucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` units per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        # Positive delta charges extra usage, negative refunds an over-estimate.
+        self._refill()
+        self.level = min(self.capacity, self.level - delta)
+
+
+class LLMScheduler:
+    """Admission control for every call a provider makes.
+
+    Calls are admitted in priority order while there is room in the concurrency
+    window and in the requests-per-minute and tokens-per-minute buckets. Throttled
+    or transiently failed calls are retried with full-jitter exponential backoff,
+    honouring ``Retry-After``. The concurrency window adapts AIMD-style: halved on
+    a 429, widened by one after a window's worth of successes.
+    """
+
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        retryable_exceptions: Tuple[Type[BaseException], ...] = (),
+    ):
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retryable_exceptions = retryable_exceptions
+
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls, retryable_exceptions: Tuple[Type[BaseException], ...] = ()) -> "LLMScheduler":
+        max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+        return cls(
+            rpm=float(os.getenv("LLM_RPM", "500")),
+            tpm=float(os.getenv("LLM_TPM", "200000")),
+            max_concurrency=max_concurrency,
+            min_concurrency=min(int(os.getenv("LLM_MIN_CONCURRENCY", "2")), max_concurrency),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "30")),
+            retryable_exceptions=retryable_exceptions,
+        )
+
+    # ---------------------------
+    # Admission
+    # ---------------------------
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._waiters and self._in_flight < self.concurrency:
+            priority, seq, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(
+                self._paused_until - time.monotonic(),
+                self._requests.wait_time(1),
+                self._tokens.wait_time(tokens),
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self._in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, tokens: int, priority: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, future))
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    # ---------------------------
+    # Feedback
+    # ---------------------------
+
+    def _on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+            self._successes = 0
+            self.concurrency += 1
+            # A pending timer dispatches with the wider window when it fires
+            if self._timer is None:
+                self._dispatch()
+
+    def _on_throttled(self, retry_after: Optional[float]) -> None:
+        self.throttled += 1
+        now = time.monotonic()
+        # One burst of 429s from calls that were all in flight counts as one signal
+        if now - self._last_decrease > 1.0:
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self._successes = 0
+            self._last_decrease = now
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        priority: Optional[int] = None,
+    ) -> Any:
+        """Run ``call`` under the budgets, retrying throttled or transient failures."""
+        if priority is None:
+            priority = llm_priority.get()
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(estimated_tokens, priority)
+            try:
+                result = await call()
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                retryable = status in RETRYABLE_STATUS or isinstance(e, self.retryable_exceptions)
+                retry_after = _retry_after(e)
+                if status == 429:
+                    self._on_throttled(retry_after)
+                if not retryable:
+                    raise
+                if attempt == self.max_retries:
+                    if status == 429:
+                        raise LLMRateLimitError("LLM provider rate limit exceeded.", retry_after) from e
+                    raise
+            else:
+                self._on_success()
+                usage = getattr(result, "usage", None)
+                if usage is not None and getattr(usage, "total_tokens", None):
+                    self._tokens.adjust(usage.total_tokens - estimated_tokens)
+                return result
+            finally:
+                # Also on cancellation (timeouts, client disconnects), or the slot leaks
+                self._release()
+            await asyncio.sleep(retry_after or self._backoff(attempt))
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000.0
+        except ValueError:
+            pass
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None
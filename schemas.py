@@ -1,13 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 
 class BiasItem(BaseModel):
     category: str
     score: float = Field(..., ge=0.0, le=1.0)
     insight_summary: Optional[str] = None
 
+class PrescreenedBiasItem(BiasItem):
+    # Answered by the lexicon pre-screen instead of the model. Not part of
+    # BiasItem, which is also the model's response format.
+    prescreened: bool = True
+
 class BiasDetectionOutput(BaseModel):
     biases: List[BiasItem]
     #highlighted_terms: List[str] = []
@@ -39,12 +44,33 @@ class PromptOut(BaseModel):
     class Config:
         from_attributes = True
 
+class PromptBatchCreate(BaseModel):
+    session_id: UUID
+    prompt_texts: List[str] = Field(..., min_length=1)
+    concurrency: Optional[int] = Field(None, ge=1)
+
+class PromptBatchItem(BaseModel):
+    index: int
+    prompt: Optional[PromptOut] = None
+    error: Optional[str] = None
+
+class PromptBatchOut(BaseModel):
+    session_id: UUID
+    succeeded: int
+    failed: int
+    results: List[PromptBatchItem]
+
 class BiasInput(BaseModel):
     prompt_id: UUID
     ai_response: str
+    # Copy the analysis of a near-identical earlier response instead of calling the model
+    reuse_similar: bool = False
+    similarity_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
 
 class BiasInsightOut(BiasItem):
     id: UUID
+    reused_from_prompt_id: Optional[UUID] = None
+    prescreened: bool = False
 
     class Config:
         from_attributes = True
@@ -75,6 +101,10 @@ class PerspectiveCreate(BaseModel):
     prompt_id: UUID
     perspective: str
 
+class PerspectiveBatchCreate(BaseModel):
+    prompt_id: UUID
+    perspectives: List[str] = Field(..., min_length=1)
+
 class PerspectiveOut(BaseModel):
     id: UUID
     prompt_id: UUID
@@ -133,3 +163,50 @@ class BiasReportOut(BaseModel):
     domain: Optional[str]
     created_at: datetime
     prompts: List[PromptReport]
+
+class AuditCreate(BaseModel):
+    session_id: UUID
+    prompt_text: str
+    perspectives: List[str] = []
+
+class AuditOut(BaseModel):
+    prompt: PromptOut
+    bias_insights: List[BiasInsightOut]
+    perspectives: List[PerspectiveOut]
+    errors: Dict[str, str] = {}
+
+class ReportJobCreate(BaseModel):
+    session_id: UUID
+
+class AnalyticsCompactJob(BaseModel):
+    # Recompute the rollups from bias_insights instead of merging them
+    rebuild: bool = False
+
+class JobCreate(BaseModel):
+    kind: Literal["analyze_prompt", "detect_bias", "report", "compact_analytics"]
+    payload: Dict[str, Any]
+
+class JobOut(BaseModel):
+    id: UUID
+    kind: str
+    status: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class BiasAggregateOut(BaseModel):
+    day: Optional[date] = None
+    domain: Optional[str] = None
+    model_used: Optional[str] = None
+    category: Optional[str] = None
+    count: int
+    mean: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    percentiles: Dict[str, Optional[float]]
@@ -1,159 +1,614 @@
 
 import os
-import json
+import math
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Optional
 from dotenv import load_dotenv
 import schemas
+import metrics
+
+if TYPE_CHECKING:
+    import httpx
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ---------------------------
 # Abstract Base Class
 # ---------------------------
 
-class LLMBase(ABC):
+class AsyncLLMBase(ABC):
     @abstractmethod
-    def analyze_prompt(self, prompt_text: str) -> str:
+    async def analyze_prompt(self, prompt_text: str) -> str:
         pass
 
     @abstractmethod
-    def detect_bias(self, ai_response: str) -> Dict:
+    async def detect_bias(self, ai_response: str) -> Dict:
         pass
 
     @abstractmethod
-    def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
         pass
 
     @abstractmethod
-    def cross_examine(
+    async def cross_examine(
         self,
         user_prompt: str,
         ai_initial_response: str,
         user_question: str,
-        previous_qa: List[dict]
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
     ) -> str:
         pass
 
+    # Streaming variants yield text deltas as they arrive. Providers without
+    # native streaming fall back to a single chunk with the full completion.
+
+    async def stream_analyze_prompt(self, prompt_text: str) -> AsyncIterator[str]:
+        yield await self.analyze_prompt(prompt_text)
+
+    async def stream_reframe_perspective(self, prompt_text: str, perspective: str) -> AsyncIterator[str]:
+        yield await self.reframe_perspective(prompt_text, perspective)
+
+    async def stream_cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        yield await self.cross_examine(user_prompt, ai_initial_response, user_question, previous_qa, history_summary)
+
+    async def summarize_cross_exam(self, previous_summary: Optional[str], turns: List[dict]) -> str:
+        """Fold ``turns`` into the rolling cross-exam summary.
+
+        The default keeps the latest questions without a model call; providers
+        override it with a real summary.
+        """
+        questions = " | ".join(qa["user_question"] for qa in turns)
+        summary = f"{previous_summary} | {questions}" if previous_summary else f"Questions asked: {questions}"
+        limit = CROSS_EXAM_SUMMARY_TOKENS * 4
+        return summary if len(summary) <= limit else "… " + summary[-limit:].lstrip()
+
+    async def warm_up(self) -> None:
+        """Open connections ahead of the first request. Optional."""
+        pass
+
+    async def aclose(self) -> None:
+        """Release pooled connections. Optional."""
+        pass
+
+
+# ---------------------------
+# Prompt builders (shared by the providers)
+# ---------------------------
+
+def build_analyze_messages(prompt_text: str) -> List[dict]:
+    prompt_text += "Keep your response under 500 tokens"
+    return [
+        {"role": "user", "content": prompt_text}
+    ]
+
+def build_bias_messages(ai_response: str) -> List[dict]:
+    system_prompt = (
+        "You are a ruthless bias detection and critique assistant. Your job is to aggressively dissect the AI response "
+        "and expose every possible bias without holding back. Be brutally honest and hyper-critical—if you see even a hint "
+        "of favoritism, stereotyping, or skewed perspective, call it out in detail. You do NOT need to be neutral; your job "
+        "is to critique harshly and point out flaws with no sugarcoating. "
+        "Score each bias category from 0 to 1 (higher = more biased) and explain why the score was given."
+        "Your bias categories should include any of these (but are not limited to): Gender, Political, Cultural, Racial, Religious, "
+        "Economic, Ideological, and any other bias you can detect. "
+        "Format your output as a JSON object with clear category scores and a brutally honest one sentence critique for each category."
+        "Make sure your score and critique justify each other."
+    )
+    user_input = (
+        #f"Prompt: {prompt_text}\n"
+        f"AI Response: {ai_response}\n"
+        "Return structured bias report."
+    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_input}
+    ]
+
+def build_reframe_messages(prompt_text: str, perspective: str) -> List[dict]:
+    reframer_prompt = (
+        f"You are rewriting AI answers from different cultural or ideological perspectives. "
+        f"Rephrase the following answer from a {perspective} point of view. "
+        "Keep it coherent and representative of that lens. Keep your response under 300 tokens. \n\n"
+        f"Original Prompt: {prompt_text}"
+    )
+    return [
+        {"role": "user", "content": reframer_prompt}
+    ]
+
+# Cross-examination context budgets. Per-turn cost is bounded by these no
+# matter how long the interrogation runs: older turns live in a rolling
+# summary (see Prompt.qa_summary) and only the latest turns are sent verbatim.
+CROSS_EXAM_PREFIX_TOKENS = int(os.getenv("CROSS_EXAM_PREFIX_TOKENS", "1500"))
+CROSS_EXAM_HISTORY_TOKENS = int(os.getenv("CROSS_EXAM_HISTORY_TOKENS", "1200"))
+CROSS_EXAM_SUMMARY_TOKENS = int(os.getenv("CROSS_EXAM_SUMMARY_TOKENS", "250"))
+
+def count_tokens(text: str) -> int:
+    # Same ~4 characters per token heuristic as scheduler.estimate_tokens
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    limit = max(budget, 0) * 4
+    return text if len(text) <= limit else text[:limit].rstrip() + " …"
+
+def build_cross_exam_messages(
+    user_prompt: str,
+    ai_initial_response: str,
+    user_question: str,
+    previous_qa: List[dict],
+    history_summary: Optional[str] = None
+) -> List[dict]:
+    system = (
+        "You are an AI being cross-examined by a human. Justify your original response while staying consistent. "
+        "Address bias, ethics, logic, and framing clearly and respectfully. Keep your response under 300 tokens."
+    )
+
+    messages = [{"role": "system", "content": system}]
+
+    # Original context. Truncation depends only on the prompt, so this prefix is
+    # byte-identical on every turn and eligible for provider prompt caching.
+    user_prompt = truncate_to_tokens(user_prompt, CROSS_EXAM_PREFIX_TOKENS // 3)
+    ai_initial_response = truncate_to_tokens(ai_initial_response or "", CROSS_EXAM_PREFIX_TOKENS - count_tokens(user_prompt))
+    messages.append({"role": "user", "content": f"User Prompt: {user_prompt}"})
+    messages.append({"role": "assistant", "content": ai_initial_response})
+
+    # Earlier turns, folded into a rolling summary
+    if history_summary:
+        summary = truncate_to_tokens(history_summary, CROSS_EXAM_SUMMARY_TOKENS)
+        messages.append({"role": "system", "content": f"Summary of the cross-examination so far: {summary}"})
+
+    # Latest Q&A turns verbatim, newest first until the history budget is spent
+    recent, remaining = [], CROSS_EXAM_HISTORY_TOKENS
+    for qa in reversed(previous_qa):
+        cost = count_tokens(qa["user_question"]) + count_tokens(qa["ai_response"] or "")
+        if cost > remaining:
+            break
+        recent.append(qa)
+        remaining -= cost
+    for qa in reversed(recent):
+        messages.append({"role": "user", "content": qa["user_question"]})
+        messages.append({"role": "assistant", "content": qa["ai_response"]})
+
+    # New question to answer
+    messages.append({"role": "user", "content": user_question})
+    return messages
+
+def build_summary_messages(previous_summary: Optional[str], turns: List[dict]) -> List[dict]:
+    system = (
+        "You keep a running summary of a human cross-examining an AI about one of its answers. "
+        "Merge the new exchanges into the existing summary. Keep the questions raised, the positions the AI "
+        f"committed to and any concessions it made. Reply with the updated summary only, under {CROSS_EXAM_SUMMARY_TOKENS} tokens."
+    )
+    exchanges = "\n\n".join(f"Q: {qa['user_question']}\nA: {qa['ai_response']}" for qa in turns)
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"Existing summary: {previous_summary or '(none)'}\n\nNew exchanges:\n{exchanges}"}
+    ]
+
 
 # ---------------------------
 # GPT-4o Integration
 # ---------------------------
 
-from openai import OpenAI
+from scheduler import LLMScheduler, estimate_tokens
 
-class OpenAIGPT(LLMBase):
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def build_async_http_client() -> "httpx.AsyncClient":
+    """Shared connection pool for one provider, tuned from the environment."""
+    # The openai SDK (and httpx under it) is the most expensive import in the
+    # app, so it is loaded when a client is built rather than with this module
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "200")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "50")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "120")),
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("LLM_TIMEOUT", "120")),
+        connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+    )
+    return DefaultAsyncHttpxClient(limits=limits, timeout=timeout)
+
+class AsyncOpenAIGPT(AsyncLLMBase):
+    # detect_bias sets no max_tokens; this is its completion budget for rate limiting
+    DETECT_BIAS_TOKEN_ESTIMATE = 1000
+
+    def __init__(self, http_client: Optional["httpx.AsyncClient"] = None):
+        # Imported here, not at module level; see build_async_http_client
+        from openai import AsyncOpenAI, APIConnectionError
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=http_client or build_async_http_client(),
+            # Retries belong to the scheduler so they respect the shared budgets
+            max_retries=0
+        )
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.scheduler = LLMScheduler.from_env(retryable_exceptions=(APIConnectionError,))
+
+    async def warm_up(self) -> None:
+        # A cheap authenticated GET per connection completes the TLS handshakes
+        # so the first user request reuses an established keep-alive socket.
+        connections = int(os.getenv("LLM_WARMUP_CONNECTIONS", "2"))
+        await asyncio.gather(*(self.client.models.list() for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        await self.client.close()
 
-    def analyze_prompt(self, prompt_text: str) -> str:
-        prompt_text += "Keep your response under 500 tokens"
-        response = self.client.chat.completions.create(
-            model=self.model,
-            max_tokens=500,
-            messages=[
-                {"role": "user", "content": prompt_text}
-            ]
+    async def _complete(self, method: str, max_tokens: int, messages: List[dict]) -> str:
+        response = await self.scheduler.run(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=messages
+            ),
+            estimated_tokens=estimate_tokens(messages, max_tokens)
         )
+        metrics.record_llm_usage("openai", method, response.usage)
         return response.choices[0].message.content
 
-    def detect_bias(self, ai_response: str) -> Dict:
-        system_prompt = (
-            "You are a ruthless bias detection and critique assistant. Your job is to aggressively dissect the AI response "
-            "and expose every possible bias without holding back. Be brutally honest and hyper-critical—if you see even a hint "
-            "of favoritism, stereotyping, or skewed perspective, call it out in detail. You do NOT need to be neutral; your job "
-            "is to critique harshly and point out flaws with no sugarcoating. "
-            "Score each bias category from 0 to 1 (higher = more biased) and explain why the score was given."
-            "Your bias categories should include any of these (but are not limited to): Gender, Political, Cultural, Racial, Religious, "
-            "Economic, Ideological, and any other bias you can detect. "
-            "Format your output as a JSON object with clear category scores and a brutally honest one sentence critique for each category."
-            "Make sure your score and critique justify each other."
-        )
-        user_input = (
-            #f"Prompt: {prompt_text}\n"
-            f"AI Response: {ai_response}\n"
-            "Return structured bias report."
-        )
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        return await self._complete("analyze_prompt", 500, build_analyze_messages(prompt_text))
 
-        response = self.client.chat.completions.parse(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            response_format=schemas.BiasDetectionOutput
+    async def detect_bias(self, ai_response: str) -> Dict:
+        messages = build_bias_messages(ai_response)
+        response = await self.scheduler.run(
+            lambda: self.client.chat.completions.parse(
+                model=self.model,
+                messages=messages,
+                response_format=schemas.BiasDetectionOutput
+            ),
+            estimated_tokens=estimate_tokens(messages, self.DETECT_BIAS_TOKEN_ESTIMATE)
         )
+        metrics.record_llm_usage("openai", "detect_bias", response.usage)
 
         return response.choices[0].message.parsed
 
-    def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
-        reframer_prompt = (
-            f"You are rewriting AI answers from different cultural or ideological perspectives. "
-            f"Rephrase the following answer from a {perspective} point of view. "
-            "Keep it coherent and representative of that lens. Keep your response under 300 tokens. \n\n"
-            f"Original Prompt: {prompt_text}"
-        )
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        return await self._complete("reframe_perspective", 300, build_reframe_messages(prompt_text, perspective))
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            max_tokens=300,
-            messages=[
-                {"role": "user", "content": reframer_prompt}
-            ]
-        )
-        return response.choices[0].message.content
-    
-    def cross_examine(
+    async def cross_examine(
         self,
         user_prompt: str,
         ai_initial_response: str,
         user_question: str,
-        previous_qa: List[dict]
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
     ) -> str:
-        system = (
-            "You are an AI being cross-examined by a human. Justify your original response while staying consistent. "
-            "Address bias, ethics, logic, and framing clearly and respectfully. Keep your response under 300 tokens."
+        messages = build_cross_exam_messages(user_prompt, ai_initial_response, user_question, previous_qa, history_summary)
+        return await self._complete("cross_examine", 300, messages)
+
+    async def summarize_cross_exam(self, previous_summary: Optional[str], turns: List[dict]) -> str:
+        messages = build_summary_messages(previous_summary, turns)
+        return await self._complete("summarize_cross_exam", CROSS_EXAM_SUMMARY_TOKENS, messages)
+
+    async def _stream(self, method: str, max_tokens: int, messages: List[dict]) -> AsyncIterator[str]:
+        # Admission and retries cover opening the stream; deltas are not retried.
+        stream = await self.scheduler.run(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=messages,
+                stream=True,
+                # Usage arrives on a final chunk with no choices
+                stream_options={"include_usage": True}
+            ),
+            estimated_tokens=estimate_tokens(messages, max_tokens)
         )
+        async for chunk in stream:
+            if chunk.usage is not None:
+                metrics.record_llm_usage("openai", method, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
-        messages = [{"role": "system", "content": system}]
+    async def stream_analyze_prompt(self, prompt_text: str) -> AsyncIterator[str]:
+        async for token in self._stream("stream_analyze_prompt", 500, build_analyze_messages(prompt_text)):
+            yield token
 
-        # Original context
-        messages.append({"role": "user", "content": f"User Prompt: {user_prompt}"})
-        messages.append({"role": "assistant", "content": ai_initial_response})
+    async def stream_reframe_perspective(self, prompt_text: str, perspective: str) -> AsyncIterator[str]:
+        async for token in self._stream("stream_reframe_perspective", 300, build_reframe_messages(prompt_text, perspective)):
+            yield token
 
-        # Prior cross-exam Q&A history
-        for qa in previous_qa:
-            messages.append({"role": "user", "content": qa["user_question"]})
-            messages.append({"role": "assistant", "content": qa["ai_response"]})
+    async def stream_cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        messages = build_cross_exam_messages(user_prompt, ai_initial_response, user_question, previous_qa, history_summary)
+        async for token in self._stream("stream_cross_examine", 300, messages):
+            yield token
 
-        # New question to answer
-        messages.append({"role": "user", "content": user_question})
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            max_tokens=300,
-            messages=messages
-        )
+# ---------------------------
+# Simulated provider
+# ---------------------------
+# Offline stand-in for benchmarks and local runs (LLM_PROVIDER=simulated).
+# Output is derived from a seeded RNG keyed on the input, so the same request
+# always gets the same answer; latency and failures are rolled per attempt.
+# Calls go through an LLMScheduler like AsyncOpenAIGPT's, so injected 429s
+# exercise the same admission, backoff and Retry-After handling.
 
-        return response.choices[0].message.content
+import random
+import itertools
+from types import SimpleNamespace
+
+SIMULATED_VOCABULARY = (
+    "the model response suggests evidence context framing perspective bias "
+    "assumption source claim tone balance audience data risk outcome policy"
+).split()
+
+
+class SimulatedLLMError(Exception):
+    """Injected provider failure."""
+
+
+class SimulatedRateLimitError(Exception):
+    """Injected 429, shaped like the openai SDK's so the scheduler retries it."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("Simulated provider rate limit.")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
 
 
+class SimulatedLLM(AsyncLLMBase):
+    """Deterministic fake provider with configurable latency and error rates.
+
+    ``latency_dist`` is ``fixed``, ``uniform`` (``latency_ms`` +/- ``jitter``) or
+    ``lognormal`` (median ``latency_ms``, shape ``jitter``).
+    """
+
+    def __init__(
+        self,
+        latency_ms: Optional[float] = None,
+        latency_dist: Optional[str] = None,
+        jitter: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        rate_limit_rate: Optional[float] = None,
+        token_ms: Optional[float] = None,
+        seed: Optional[str] = None,
+        retry_after: Optional[float] = None,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        self.model = "simulated"
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("SIM_LLM_LATENCY_MS", "200"))
+        self.latency_dist = latency_dist or os.getenv("SIM_LLM_LATENCY_DIST", "lognormal")
+        self.jitter = jitter if jitter is not None else float(os.getenv("SIM_LLM_JITTER", "0.5"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("SIM_LLM_ERROR_RATE", "0"))
+        self.rate_limit_rate = rate_limit_rate if rate_limit_rate is not None else float(os.getenv("SIM_LLM_RATE_LIMIT_RATE", "0"))
+        # Delay between streamed chunks
+        self.token_ms = token_ms if token_ms is not None else float(os.getenv("SIM_LLM_TOKEN_MS", "5"))
+        self.seed = seed if seed is not None else os.getenv("SIM_LLM_SEED", "0")
+        # Retry-After sent with injected 429s, in seconds
+        self.retry_after = retry_after if retry_after is not None else float(os.getenv("SIM_LLM_RETRY_AFTER", "1"))
+        self.scheduler = scheduler or LLMScheduler.from_env()
+        if self.latency_dist not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unsupported latency distribution: {self.latency_dist}")
+
+    def _rng(self, method: str, *inputs: str) -> random.Random:
+        return random.Random("\x1f".join((self.seed, method) + inputs))
+
+    def _latency(self, rng: random.Random) -> float:
+        if self.latency_dist == "fixed":
+            ms = self.latency_ms
+        elif self.latency_dist == "uniform":
+            ms = rng.uniform(self.latency_ms * (1 - self.jitter), self.latency_ms * (1 + self.jitter))
+        else:
+            ms = rng.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.jitter)
+        return max(ms, 0.0) / 1000.0
+
+    def _maybe_fail(self, rng: random.Random) -> None:
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            raise SimulatedRateLimitError(self.retry_after)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise SimulatedLLMError("Simulated provider failure.")
+
+    async def _call(self, method: str, words: int, *inputs: str) -> random.Random:
+        """Wait out one call under the scheduler; returns the RNG the output is drawn from."""
+        attempts = itertools.count()
+
+        async def attempt() -> None:
+            rng = self._rng(method, *inputs, str(next(attempts)))
+            await asyncio.sleep(self._latency(rng))
+            self._maybe_fail(rng)
+
+        messages = [{"content": text} for text in inputs]
+        await self.scheduler.run(attempt, estimated_tokens=estimate_tokens(messages, words * 2))
+        return self._rng(method, *inputs)
+
+    def _text(self, rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(SIMULATED_VOCABULARY) for _ in range(words)).capitalize() + "."
+
+    async def _respond(self, method: str, words: int, *inputs: str) -> str:
+        rng = await self._call(method, words, *inputs)
+        return self._text(rng, words)
+
+    async def _stream_response(self, method: str, words: int, *inputs: str) -> AsyncIterator[str]:
+        # Same output as the non-streaming call, split into word-sized chunks
+        text = await self._respond(method, words, *inputs)
+        for index, word in enumerate(text.split(" ")):
+            if index:
+                await asyncio.sleep(self.token_ms / 1000.0)
+            yield word if index == 0 else " " + word
+
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        return await self._respond("analyze_prompt", 120, prompt_text)
+
+    async def detect_bias(self, ai_response: str) -> schemas.BiasDetectionOutput:
+        rng = await self._call("detect_bias", 100, ai_response)
+        categories = rng.sample(["gender", "cultural", "political", "confirmation", "framing"], k=rng.randint(1, 3))
+        return schemas.BiasDetectionOutput(biases=[
+            schemas.BiasItem(category=category, score=round(rng.random(), 2), insight_summary=self._text(rng, 20))
+            for category in categories
+        ])
+
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        return await self._respond("reframe_perspective", 80, prompt_text, perspective)
+
+    async def cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> str:
+        return await self._respond("cross_examine", 80, user_prompt, user_question)
+
+    async def summarize_cross_exam(self, previous_summary: Optional[str], turns: List[dict]) -> str:
+        return await self._respond("summarize_cross_exam", 60, previous_summary or "", *(qa["user_question"] for qa in turns))
+
+    async def stream_analyze_prompt(self, prompt_text: str) -> AsyncIterator[str]:
+        async for token in self._stream_response("analyze_prompt", 120, prompt_text):
+            yield token
+
+    async def stream_reframe_perspective(self, prompt_text: str, perspective: str) -> AsyncIterator[str]:
+        async for token in self._stream_response("reframe_perspective", 80, prompt_text, perspective):
+            yield token
+
+    async def stream_cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        async for token in self._stream_response("cross_examine", 80, user_prompt, user_question):
+            yield token
 
 
 # ---------------------------
 # LLM Factory
 # ---------------------------
 
-def get_llm(model_name: str = "openai") -> LLMBase:
-    if model_name == "openai":
-        return OpenAIGPT()
-    else:
-        raise ValueError(f"Unsupported model: {model_name}")
+class LLMRegistry:
+    """Process-wide pool of async LLM clients, one per provider.
+
+    Clients are built once in the app lifespan (see ``main.py``) and reused by
+    every request, so connections and TLS sessions are kept alive between calls.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], AsyncLLMBase]] = {}
+        self._instances: Dict[str, AsyncLLMBase] = {}
+
+    def register(self, name: str, factory: Callable[[], AsyncLLMBase]) -> None:
+        self._factories[name] = factory
+
+    def get(self, name: str) -> AsyncLLMBase:
+        if name not in self._instances:
+            if name not in self._factories:
+                raise ValueError(f"Unsupported model: {name}")
+            self._instances[name] = self._factories[name]()
+        return self._instances[name]
+
+    async def startup(self, names: Optional[List[str]] = None, warm_up: Optional[bool] = None) -> None:
+        if warm_up is None:
+            warm_up = os.getenv("LLM_WARMUP", "true").lower() == "true"
+        # Only the active provider is built eagerly; others are created on first use
+        for name in names or [LLM_PROVIDER]:
+            try:
+                llm = self.get(name)
+                if warm_up:
+                    await llm.warm_up()
+            except Exception as e:
+                # A provider that can't start (missing key, network down) must
+                # not take the API with it; get() retries lazily on first use.
+                logger.warning("LLM provider %r failed to start: %s", name, e)
+
+    async def shutdown(self) -> None:
+        instances, self._instances = self._instances, {}
+        for llm in instances.values():
+            await llm.aclose()
+
+
+class InstrumentedLLM(AsyncLLMBase):
+    """Wraps a registered provider to record per-method call latency (see ``metrics.py``)."""
+
+    def __init__(self, llm: AsyncLLMBase, provider: str):
+        self.llm = llm
+        self.provider = provider
+        self.model = getattr(llm, "model", type(llm).__name__)
+
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        with metrics.observe_llm_call(self.provider, "analyze_prompt"):
+            return await self.llm.analyze_prompt(prompt_text)
+
+    async def detect_bias(self, ai_response: str) -> Dict:
+        with metrics.observe_llm_call(self.provider, "detect_bias"):
+            return await self.llm.detect_bias(ai_response)
+
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        with metrics.observe_llm_call(self.provider, "reframe_perspective"):
+            return await self.llm.reframe_perspective(prompt_text, perspective)
+
+    async def cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> str:
+        with metrics.observe_llm_call(self.provider, "cross_examine"):
+            return await self.llm.cross_examine(user_prompt, ai_initial_response, user_question, previous_qa, history_summary)
+
+    async def summarize_cross_exam(self, previous_summary: Optional[str], turns: List[dict]) -> str:
+        with metrics.observe_llm_call(self.provider, "summarize_cross_exam"):
+            return await self.llm.summarize_cross_exam(previous_summary, turns)
+
+    async def stream_analyze_prompt(self, prompt_text: str) -> AsyncIterator[str]:
+        with metrics.observe_llm_call(self.provider, "stream_analyze_prompt"):
+            async for token in self.llm.stream_analyze_prompt(prompt_text):
+                yield token
+
+    async def stream_reframe_perspective(self, prompt_text: str, perspective: str) -> AsyncIterator[str]:
+        with metrics.observe_llm_call(self.provider, "stream_reframe_perspective"):
+            async for token in self.llm.stream_reframe_perspective(prompt_text, perspective):
+                yield token
+
+    async def stream_cross_examine(
+        self,
+        user_prompt: str,
+        ai_initial_response: str,
+        user_question: str,
+        previous_qa: List[dict],
+        history_summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        with metrics.observe_llm_call(self.provider, "stream_cross_examine"):
+            async for token in self.llm.stream_cross_examine(user_prompt, ai_initial_response, user_question, previous_qa, history_summary):
+                yield token
+
+
+# Provider used by the routes and jobs; "simulated" runs fully offline
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+
+llm_registry = LLMRegistry()
+llm_registry.register("openai", AsyncOpenAIGPT)
+llm_registry.register("simulated", SimulatedLLM)
+
+def get_async_llm(model_name: Optional[str] = None) -> AsyncLLMBase:
+    model_name = model_name or LLM_PROVIDER
+    return InstrumentedLLM(llm_registry.get(model_name), model_name)
 
 # def main():
-#     model = get_llm("openai")
-#     x = model.detect_bias("The best getup for a fashion show can vary significantly depending on the theme of the show, the designer's aesthetic, and your personal style. However, here are some general tips and ideas for various styles you may consider:\n\n### 1. **Chic and Elegant:**\n   - **Outfit:** A tailored jumpsuit or an elegant gown with clean lines.\n   - **Accessories:** Minimalist jewelry, a clutch, and classic pumps.\n   - **Makeup:** Smoky eyes and nude lips for a sophisticated look.\n\n### 2. **Street Style Inspired:**\n   - **Outfit:** Oversized blazer paired with a graphic tee and stylish high-waisted trousers or a denim skirt.\n   - **Accessories:** Chunky sneakers or ankle boots, hoop earrings, and a trendy crossbody bag.\n   - **Makeup:** Bold lip color and a natural, dewy finish.\n\n### 3. **Bohemian Vibes:**\n   - **Outfit:** Flowy")
+#     model = get_async_llm("openai")
+#     x = asyncio.run(model.detect_bias("The best getup for a fashion show can vary significantly depending on the theme of the show, the designer's aesthetic, and your personal style. However, here are some general tips and ideas for various styles you may consider:\n\n### 1. **Chic and Elegant:**\n   - **Outfit:** A tailored jumpsuit or an elegant gown with clean lines.\n   - **Accessories:** Minimalist jewelry, a clutch, and classic pumps.\n   - **Makeup:** Smoky eyes and nude lips for a sophisticated look.\n\n### 2. **Street Style Inspired:**\n   - **Outfit:** Oversized blazer paired with a graphic tee and stylish high-waisted trousers or a denim skirt.\n   - **Accessories:** Chunky sneakers or ankle boots, hoop earrings, and a trendy crossbody bag.\n   - **Makeup:** Bold lip color and a natural, dewy finish.\n\n### 3. **Bohemian Vibes:**\n   - **Outfit:** Flowy"))
 #     print(x)
 
 # main()
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Offline settings, fixed before any app module reads them
+_TMP = tempfile.mkdtemp(prefix="unmaskai-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.update(
+    LLM_PROVIDER="simulated",
+    LLM_WARMUP="false",
+    JOB_WORKERS="0",
+    ANALYTICS_COMPACT_INTERVAL="0",
+)
+
+
+@pytest.fixture(scope="session")
+def migrated():
+    import database
+    database.run_migrations()
+    return database
+
+
+@pytest.fixture
+def db(migrated):
+    session = migrated.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
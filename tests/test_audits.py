@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+import analytics
+import crud
+import routes
+import schemas
+from models import BiasInsight, PerspectiveOutput, Prompt
+from services import AsyncLLMBase
+
+
+class AuditLLM(AsyncLLMBase):
+    def __init__(self, fail_analysis: bool = False, fail_perspective: str = None):
+        self.fail_analysis = fail_analysis
+        self.fail_perspective = fail_perspective
+
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        if self.fail_analysis:
+            raise RuntimeError("provider down")
+        return f"Answer to {prompt_text}"
+
+    async def detect_bias(self, ai_response: str) -> schemas.BiasDetectionOutput:
+        return schemas.BiasDetectionOutput(biases=[schemas.BiasItem(category="Framing", score=0.4)])
+
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        if perspective == self.fail_perspective:
+            raise RuntimeError("reframe failed")
+        return f"{perspective} view"
+
+    async def cross_examine(self, user_prompt, ai_initial_response, user_question, previous_qa, history_summary=None) -> str:
+        return user_question
+
+
+def audit(session_id, llm):
+    payload = schemas.AuditCreate(session_id=session_id, prompt_text="question", perspectives=["economic", "legal"])
+    return asyncio.run(routes.run_full_audit(payload, llm=llm))
+
+
+def stored(db, session_id):
+    prompts = db.query(Prompt).filter(Prompt.session_id == session_id).all()
+    ids = [p.id for p in prompts]
+    return (
+        len(prompts),
+        db.query(BiasInsight).filter(BiasInsight.prompt_id.in_(ids)).count(),
+        db.query(PerspectiveOutput).filter(PerspectiveOutput.prompt_id.in_(ids)).count(),
+    )
+
+
+def test_a_failed_perspective_keeps_the_rest_of_the_audit(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    result = audit(session.id, AuditLLM(fail_perspective="legal"))
+
+    assert list(result.errors) == ["perspective:legal"]
+    assert [p.perspective for p in result.perspectives] == ["economic"]
+    assert stored(db, session.id) == (1, 1, 1)
+
+
+def test_a_failed_analysis_stores_nothing(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    with pytest.raises(HTTPException):
+        audit(session.id, AuditLLM(fail_analysis=True))
+    assert stored(db, session.id) == (0, 0, 0)
+
+
+def test_a_failed_write_rolls_back_the_whole_audit(migrated, db, monkeypatch):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("rollup write failed")
+
+    # Fails after the prompt row has been flushed
+    monkeypatch.setattr(analytics, "record_insights", broken)
+    with pytest.raises(RuntimeError):
+        audit(session.id, AuditLLM())
+    assert stored(db, session.id) == (0, 0, 0)
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+import schemas
+from cache import CachedLLM, LLMCache, cache_bypass_requested
+from services import AsyncLLMBase
+
+
+class CountingLLM(AsyncLLMBase):
+    def __init__(self):
+        self.model = f"counting-{uuid.uuid4()}"
+        self.calls = 0
+
+    async def detect_bias(self, ai_response: str) -> schemas.BiasDetectionOutput:
+        self.calls += 1
+        return schemas.BiasDetectionOutput(biases=[
+            schemas.BiasItem(category="Framing", score=0.3, insight_summary=ai_response)
+        ])
+
+    async def analyze_prompt(self, prompt_text: str) -> str:
+        self.calls += 1
+        return prompt_text
+
+    async def reframe_perspective(self, prompt_text: str, perspective: str) -> str:
+        self.calls += 1
+        return f"{perspective}: {prompt_text}"
+
+    async def cross_examine(self, user_prompt, ai_initial_response, user_question, previous_qa, history_summary=None) -> str:
+        self.calls += 1
+        return user_question
+
+
+def make_cache(max_entries: int = 16) -> LLMCache:
+    return LLMCache(max_entries=max_entries, ttl=3600, db_ttl=0)
+
+
+def test_identical_requests_call_the_model_once(migrated):
+    llm, cache = CountingLLM(), make_cache()
+    cached = CachedLLM(llm, cache=cache)
+
+    first = asyncio.run(cached.detect_bias("same response"))
+    second = asyncio.run(cached.detect_bias("same  response "))
+    assert llm.calls == 1
+    assert second == first
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_evicted_entries_are_served_from_the_database(migrated):
+    llm, cache = CountingLLM(), make_cache(max_entries=1)
+    cached = CachedLLM(llm, cache=cache)
+
+    asyncio.run(cached.detect_bias("first"))
+    asyncio.run(cached.detect_bias("second"))
+    result = asyncio.run(cached.detect_bias("first"))
+    assert llm.calls == 2
+    assert cache.stats()["db_hits"] == 1
+    assert result.biases[0].insight_summary == "first"
+
+
+def test_bypass_reaches_the_model(migrated):
+    llm, cache = CountingLLM(), make_cache()
+
+    asyncio.run(CachedLLM(llm, cache=cache).detect_bias("response"))
+    asyncio.run(CachedLLM(llm, cache=cache, bypass=True).detect_bias("response"))
+    assert llm.calls == 2
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_bypass_headers():
+    assert cache_bypass_requested({"x-cache-bypass": "true"})
+    assert cache_bypass_requested({"cache-control": "no-cache"})
+    assert not cache_bypass_requested({"x-cache-bypass": "0"})
+    assert not cache_bypass_requested({})
+
+
+def test_bypass_header_reaches_the_route_dependency():
+    from starlette.requests import Request
+    from routes import get_cached_llm
+
+    def request(headers):
+        return Request({"type": "http", "headers": [(k.encode(), v.encode()) for k, v in headers.items()]})
+
+    bypassed = get_cached_llm(request({"x-cache-bypass": "1"}))
+    assert isinstance(bypassed, CachedLLM) and bypassed.bypass
+    # Without the header the cache sits under the pre-screen
+    assert not get_cached_llm(request({})).llm.bypass
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta
+import crud
+import routes
+from models import Prompt
+from services import (
+    CROSS_EXAM_HISTORY_TOKENS, CROSS_EXAM_PREFIX_TOKENS, CROSS_EXAM_SUMMARY_TOKENS,
+    build_cross_exam_messages, count_tokens
+)
+
+
+def turns(n: int, words: int = 150) -> list:
+    return [
+        {"user_question": f"Question {i}? " + "why " * words, "ai_response": f"Answer {i}. " + "because " * words}
+        for i in range(n)
+    ]
+
+
+def test_messages_fit_the_budgets_however_long_the_exam():
+    history = turns(40)
+    messages = build_cross_exam_messages("prompt " * 5000, "response " * 5000, "Final question?", history, "summary " * 2000)
+
+    system, prompt, response, summary, *verbatim, question = messages
+    assert count_tokens(prompt["content"]) + count_tokens(response["content"]) <= CROSS_EXAM_PREFIX_TOKENS + 10
+    assert count_tokens(summary["content"]) <= CROSS_EXAM_SUMMARY_TOKENS + 20
+    assert sum(count_tokens(m["content"]) for m in verbatim) <= CROSS_EXAM_HISTORY_TOKENS
+    assert question == {"role": "user", "content": "Final question?"}
+    # The newest turns are the ones kept
+    assert verbatim[-1]["content"] == history[-1]["ai_response"]
+    assert verbatim[0]["role"] == "user"
+
+
+def test_prefix_is_identical_on_every_turn():
+    first = build_cross_exam_messages("prompt " * 5000, "response " * 5000, "First?", [], None)
+    later = build_cross_exam_messages("prompt " * 5000, "response " * 5000, "Later?", turns(3), "Earlier questions.")
+    assert first[:3] == later[:3]
+
+
+class SummarizingLLM:
+    def __init__(self):
+        self.folded = []
+
+    async def summarize_cross_exam(self, previous_summary, turns):
+        self.folded.append([qa["user_question"] for qa in turns])
+        return f"summary of {len(turns)} turns"
+
+
+def test_old_turns_are_folded_into_the_summary(migrated, db, monkeypatch):
+    llm = SummarizingLLM()
+    monkeypatch.setattr(routes, "get_async_llm", lambda: llm)
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    prompt = crud.create_prompt(db, session.id, "prompt", "response")
+    written = [
+        crud.create_cross_exam(db, prompt.id, f"q{i}", f"a{i}")
+        for i in range(routes.CROSS_EXAM_RECENT_TURNS + routes.CROSS_EXAM_SUMMARY_BATCH - 1)
+    ]
+
+    # One turn short of a batch: nothing to fold yet
+    asyncio.run(routes.refresh_cross_exam_summary(prompt.id))
+    assert llm.folded == []
+
+    written.append(crud.create_cross_exam(db, prompt.id, "last", "answer"))
+    asyncio.run(routes.refresh_cross_exam_summary(prompt.id))
+    fold = written[:routes.CROSS_EXAM_SUMMARY_BATCH]
+    assert llm.folded == [[qa.user_question for qa in fold]]
+    db.expire_all()
+    stored = db.get(Prompt, prompt.id)
+    assert stored.qa_summary == f"summary of {len(fold)} turns"
+    assert stored.qa_summary_until == fold[-1].created_at
+
+
+def test_a_stale_summary_update_is_rejected(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    prompt = crud.create_prompt(db, session.id, "prompt", "response")
+    until = datetime(2026, 1, 1)
+    assert crud.update_cross_exam_summary(db, prompt.id, "current", until=until, expected_until=None)
+
+    # Raced with the update above: it still expects no summary
+    assert not crud.update_cross_exam_summary(
+        db, prompt.id, "stale", until=until + timedelta(minutes=1), expected_until=None
+    )
+    db.expire_all()
+    stored = db.get(Prompt, prompt.id)
+    assert (stored.qa_summary, stored.qa_summary_until) == ("current", until)
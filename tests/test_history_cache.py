@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime
+import crud
+from history_cache import CrossExamHistoryCache, load_prompt_history
+from models import CrossExam
+
+
+def same_instant_turns(prompt_id):
+    # Written in one instant, in an order that differs from their ids'
+    ids = sorted(uuid.uuid4() for _ in range(3))
+    at = datetime(2026, 1, 1, 12, 0, 0)
+    return [
+        CrossExam(id=ids[i], prompt_id=prompt_id, user_question=f"q{i}", ai_response=f"a{i}", created_at=at)
+        for i in (2, 0, 1)
+    ]
+
+
+def page_ids(db, prompt_id):
+    return [qa.id for qa in crud.get_cross_exams_page(db, prompt_id, None, 10)]
+
+
+def test_loaded_history_breaks_timestamp_ties_like_the_pages(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    prompt = crud.create_prompt(db, session.id, "prompt", "response")
+    db.add_all(same_instant_turns(prompt.id))
+    db.commit()
+
+    cache = CrossExamHistoryCache(max_prompts=10, idle_ttl=900, max_turns=32)
+    history = load_prompt_history(db, prompt.id, cache)
+    assert [qa["id"] for qa in history.turns] == page_ids(db, prompt.id)
+    assert [qa["id"] for qa in cache.get(prompt.id).turns] == page_ids(db, prompt.id)
+
+
+def test_appended_turns_keep_the_page_order(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    prompt = crud.create_prompt(db, session.id, "prompt", "response")
+    cache = CrossExamHistoryCache(max_prompts=10, idle_ttl=900, max_turns=32)
+    load_prompt_history(db, prompt.id, cache)
+
+    for turn in same_instant_turns(prompt.id):
+        db.add(turn)
+        db.commit()
+        cache.append(turn)
+    assert [qa["id"] for qa in cache.get(prompt.id).turns] == page_ids(db, prompt.id)
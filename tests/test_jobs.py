@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+import jobs
+from models import Job
+
+
+def stale_job(db) -> Job:
+    job = Job(
+        id=uuid.uuid4(), kind="report", status="running", payload={}, attempts=1,
+        created_at=datetime.utcnow(), started_at=datetime.utcnow() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_stale_jobs_are_requeued_while_the_pool_runs(migrated, db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_SWEEP_INTERVAL", 0.02)
+    worker = jobs.JobWorker(concurrency=0)
+
+    async def run():
+        sweep = asyncio.create_task(worker._requeue_stale())
+        await asyncio.sleep(0.05)
+        # Orphaned after the first sweep already ran
+        late = stale_job(db)
+        await asyncio.sleep(0.1)
+        sweep.cancel()
+        await asyncio.gather(sweep, return_exceptions=True)
+        return late
+
+    late = asyncio.run(run())
+    db.expire_all()
+    assert db.get(Job, late.id).status == "queued"
+
+
+def test_failed_finish_does_not_kill_the_worker(migrated, db, monkeypatch):
+    job = jobs.enqueue_job(db, "report", {"session_id": str(uuid.uuid4())})
+
+    def broken_finish(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(jobs, "finish_job", broken_finish)
+    worker = jobs.JobWorker(concurrency=0)
+    # Logged, not raised
+    asyncio.run(worker._execute(job))
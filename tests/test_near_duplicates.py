@@ -0,0 +1,25 @@
+import crud
+import near_duplicates
+from models import ResponseSignature
+
+
+def test_precomputed_signature_matches_the_inline_one(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    text = "The committee met on 12 March and approved the budget for the new library."
+    inline = crud.create_prompt(db, session.id, "prompt", text)
+    precomputed = crud.create_prompt(
+        db, session.id, "prompt", text, signature=near_duplicates.response_signature(text)
+    )
+
+    stored = {
+        row.prompt_id: row.minhash
+        for row in db.query(ResponseSignature).filter(ResponseSignature.prompt_id.in_([inline.id, precomputed.id]))
+    }
+    assert stored[inline.id] == stored[precomputed.id]
+    matches = near_duplicates.find_near_duplicates(db, near_duplicates.minhash(text), 0.99, exclude=inline.id)
+    assert [prompt_id for prompt_id, _ in matches] == [precomputed.id]
+
+
+def test_blank_responses_get_no_signature():
+    assert near_duplicates.response_signature("   ") is None
+    assert near_duplicates.signature_rows("id", None) == ([], [])
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+import crud
+import pagination
+import routes
+
+
+def walk(fetch, limit: int):
+    """Follow X-Next-Cursor values until the last page, as a client would."""
+    seen, cursor = [], None
+    while True:
+        rows = fetch(pagination.decode_cursor(cursor), limit + 1)
+        page, cursor = pagination.split_page(rows, limit)
+        seen.append([row.id for row in page])
+        if cursor is None:
+            return seen
+
+
+def test_cursors_walk_rows_sharing_a_timestamp_in_id_order(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    # One bulk write: every prompt gets the same created_at
+    prompts = crud.create_prompts_bulk(db, session.id, [(f"prompt {i}", f"response {i}") for i in range(7)])
+    assert len({p.created_at for p in prompts}) == 1
+
+    pages = walk(lambda after, limit: crud.get_session_prompts_page(db, session.id, after, limit), 3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [row_id for page in pages for row_id in page] == sorted(p.id for p in prompts)
+
+
+def test_a_cursor_round_trips():
+    position = (datetime(2026, 1, 2, 3, 4, 5, 678901), uuid.uuid4())
+    cursor = pagination.encode_cursor(position)
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    "bm90IGpzb24",  # base64 of "not json"
+    pagination.encode_cursor((datetime(2026, 1, 1), "not-a-uuid")),
+])
+def test_malformed_cursors_are_rejected_with_400(cursor):
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.decode_cursor(cursor)
+    with pytest.raises(HTTPException) as error:
+        routes.decode_cursor_or_400(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,37 @@
+import asyncio
+import crud
+import prescreen
+from models import BiasScoreRollup
+
+
+def test_everyday_words_are_not_bias_indicators():
+    for text in (
+        "the man page explains it",
+        "The government should fund schools",
+        "Fix the race condition in the native code path.",
+    ):
+        assert prescreen.screen(text).max_score < prescreen.PRESCREEN_THRESHOLD, text
+
+
+def test_generalizations_about_groups_still_score_high():
+    result = prescreen.screen("Women are naturally nurturing and all women should stay home.")
+    assert result.top_category == "Gender"
+    assert result.max_score > 0.9
+    assert prescreen.screen("Democrats always lie.").top_category == "Political"
+
+
+def test_skipped_insights_are_labelled_and_kept_out_of_analytics(migrated, db):
+    class ModelNotCalled:
+        async def detect_bias(self, ai_response):
+            raise AssertionError("the pre-screen should have answered")
+
+    session = crud.create_session(db, model_used="simulated", domain="prescreen-tests")
+    text = "Preheat the oven and bake the bread for 20 minutes."
+    prompt = crud.create_prompt(db, session.id, "bake bread", text)
+    output = asyncio.run(prescreen.PrescreenedLLM(ModelNotCalled(), "skip").detect_bias(text))
+
+    records = crud.store_bias_insights(db, prompt_id=prompt.id, bias_data=output.biases)
+    assert [r.prescreened for r in records] == [True]
+    assert db.query(BiasScoreRollup).filter(BiasScoreRollup.domain == "prescreen-tests").count() == 0
+    entry = crud.get_session_report(db, session.id).final_json["prompts"][0]["bias_insights"][0]
+    assert entry["prescreened"] is True
@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+import crud
+
+
+def test_concurrent_writes_all_reach_the_report(migrated, db):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    prompt = crud.create_prompt(db, session.id, "prompt", "response")
+    first = crud.get_session_report(db, session.id)
+    first_etag = first.etag
+
+    def reframe(n: int) -> None:
+        with migrated.SessionLocal() as own:
+            crud.create_perspective_output(own, prompt.id, f"lens {n}", f"output {n}")
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        list(pool.map(reframe, range(20)))
+
+    report = crud.get_session_report(db, session.id)
+    assert report.etag != first_etag
+    assert len(report.final_json["prompts"][0]["perspectives"]) == 20
+    # A second read serves the stored rendering under the same ETag
+    assert crud.get_session_report(db, session.id).etag == report.etag
+    assert crud.rebuild_session_report(db, session.id).final_json == report.final_json
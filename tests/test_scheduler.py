@@ -0,0 +1,158 @@
+import time
+import asyncio
+from scheduler import BATCH, INTERACTIVE, LLMScheduler
+
+
+def make_scheduler(**kwargs) -> LLMScheduler:
+    return LLMScheduler(rpm=10_000, tpm=10_000_000, max_concurrency=2, max_retries=0, **kwargs)
+
+
+def test_cancelled_call_releases_its_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(scheduler.run(hang, estimated_tokens=10), 0.05)
+            except asyncio.TimeoutError:
+                pass
+        assert scheduler._in_flight == 0
+
+        async def answer():
+            return "ok"
+
+        return await asyncio.wait_for(scheduler.run(answer, estimated_tokens=10), 1.0)
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_failed_call_releases_its_slot():
+    async def scenario():
+        scheduler = make_scheduler()
+
+        async def fail():
+            raise ValueError("boom")
+
+        for _ in range(3):
+            try:
+                await scheduler.run(fail, estimated_tokens=10)
+            except ValueError:
+                pass
+        return scheduler._in_flight
+
+    assert asyncio.run(scenario()) == 0
+
+
+class Throttled(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after} if retry_after else {}})()
+
+
+def drain(scheduler: LLMScheduler) -> None:
+    scheduler._requests.level = 0
+    scheduler._requests.updated = time.monotonic()
+
+
+def test_a_burst_of_429s_halves_the_window_once():
+    async def scenario():
+        scheduler = LLMScheduler(rpm=10_000, tpm=10_000_000, max_concurrency=8, max_retries=0)
+
+        async def throttled():
+            await asyncio.sleep(0.01)
+            raise Throttled()
+
+        await asyncio.gather(
+            *(scheduler.run(throttled, estimated_tokens=10) for _ in range(4)), return_exceptions=True
+        )
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.throttled == 4
+    assert scheduler.concurrency == 4
+
+
+def test_retry_after_pauses_admission():
+    async def scenario():
+        scheduler = LLMScheduler(rpm=10_000, tpm=10_000_000, max_concurrency=2, max_retries=1)
+        attempts = []
+
+        async def throttled_once():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise Throttled(retry_after="0.2")
+            return "ok"
+
+        result = await scheduler.run(throttled_once, estimated_tokens=10)
+        # A call arriving during the pause waits it out too
+        started = time.monotonic()
+        await scheduler.run(throttled_once, estimated_tokens=10)
+        return result, attempts, started
+
+    result, attempts, started = asyncio.run(scenario())
+    assert result == "ok"
+    assert attempts[1] - attempts[0] >= 0.2
+    assert attempts[2] >= started
+
+
+def test_successes_widen_the_window_back_to_the_maximum():
+    async def scenario():
+        scheduler = LLMScheduler(rpm=10_000, tpm=10_000_000, max_concurrency=4, min_concurrency=1)
+        scheduler.concurrency = 1
+
+        async def answer():
+            return "ok"
+
+        seen = []
+        for _ in range(20):
+            await scheduler.run(answer, estimated_tokens=10)
+            seen.append(scheduler.concurrency)
+        return seen
+
+    seen = asyncio.run(scenario())
+    # One more slot after a window's worth of successes: 1 + 2 + 3 calls to reach 4
+    assert seen[:6] == [2, 2, 3, 3, 3, 4]
+    assert max(seen) == 4 and seen[-1] == 4
+
+
+def test_interactive_calls_go_before_batch_calls_on_a_drained_bucket():
+    async def scenario():
+        scheduler = LLMScheduler(rpm=600, tpm=10_000_000, max_concurrency=4)
+        drain(scheduler)
+        order = []
+
+        def call(name):
+            async def run():
+                order.append(name)
+            return run
+
+        batch = asyncio.create_task(scheduler.run(call("batch"), estimated_tokens=10, priority=BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(scheduler.run(call("interactive"), estimated_tokens=10, priority=INTERACTIVE))
+        await asyncio.gather(batch, interactive)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch"]
+
+
+def test_widening_the_window_keeps_a_single_pending_timer():
+    async def scenario():
+        scheduler = LLMScheduler(rpm=60, tpm=10_000_000, max_concurrency=4)
+        scheduler.concurrency = 1
+        drain(scheduler)
+        waiter = asyncio.create_task(scheduler._acquire(10, INTERACTIVE))
+        await asyncio.sleep(0)
+        timer = scheduler._timer
+        scheduler._on_success()
+        assert scheduler.concurrency == 2
+        assert scheduler._timer is timer
+        waiter.cancel()
+        timer.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+import crud
+import schemas
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def make_session(db, prompts: int):
+    session = crud.create_session(db, model_used="simulated", domain="tests")
+    for i in range(prompts):
+        prompt = crud.create_prompt(db, session.id, f"prompt {i}", f"response {i}")
+        crud.store_bias_insights(db, prompt.id, [
+            schemas.BiasItem(category="Gender", score=0.4, insight_summary="summary")
+        ])
+        crud.create_cross_exam(db, prompt.id, "why?", "because")
+        crud.create_perspective_output(db, prompt.id, "economist", "reframed")
+        crud.create_human_override(db, prompt.id, "corrected", "reason", ["tag"])
+    return session.id
+
+
+def graph_queries(db, session_id) -> int:
+    db.expunge_all()
+    with count_queries(db.get_bind()) as statements:
+        graph = crud.get_session_graph(db, session_id)
+        # Touch every relationship: none may lazy-load
+        for prompt in graph.prompts:
+            prompt.bias_insights, prompt.cross_exams, prompt.perspectives, prompt.human_override
+    return len(statements)
+
+
+def test_session_graph_query_count_is_independent_of_prompt_count(db):
+    one = graph_queries(db, make_session(db, 1))
+    many = graph_queries(db, make_session(db, 25))
+    # Session, prompts, and one per child relationship
+    assert one == many == 6
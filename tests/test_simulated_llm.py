@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from scheduler import LLMRateLimitError, LLMScheduler
+from services import SimulatedLLM
+
+
+def make_llm(rate_limit_rate: float, max_retries: int) -> SimulatedLLM:
+    scheduler = LLMScheduler(
+        rpm=10_000, tpm=10_000_000, max_concurrency=8, max_retries=max_retries, backoff_base=0.001
+    )
+    return SimulatedLLM(
+        latency_ms=0, latency_dist="fixed", error_rate=0, rate_limit_rate=rate_limit_rate,
+        retry_after=0.01, scheduler=scheduler
+    )
+
+
+def test_simulated_429s_are_retried_by_the_scheduler():
+    llm = make_llm(rate_limit_rate=0.5, max_retries=10)
+
+    async def scenario():
+        return await asyncio.gather(*(llm.analyze_prompt(f"prompt {i}") for i in range(20)))
+
+    answers = asyncio.run(scenario())
+    assert all(answers)
+    assert llm.scheduler.throttled > 0
+    assert llm.scheduler.concurrency < 8
+    # Retries roll again, but the answer depends on the input alone
+    assert asyncio.run(make_llm(0, 0).analyze_prompt("prompt 3")) == answers[3]
+
+
+def test_simulated_429s_surface_as_rate_limit_errors_after_the_last_retry():
+    llm = make_llm(rate_limit_rate=1.0, max_retries=1)
+    with pytest.raises(LLMRateLimitError) as error:
+        asyncio.run(llm.detect_bias("response"))
+    assert error.value.retry_after == 0.01
+    assert llm.scheduler.throttled == 2